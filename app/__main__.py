@@ -1,11 +1,15 @@
 import granian
-from granian.constants import Interfaces, Loops
+from granian.constants import HTTPModes, Interfaces, Loops
+from granian.http import HTTP1Settings
 from granian.log import LogLevels
 
+from app.resources.pool_metrics import setup_multiprocess_metrics
 from app.settings import settings
 
 
 if __name__ == "__main__":
+    if settings.app_workers > 1:
+        setup_multiprocess_metrics()
     granian.Granian(
         target="app.application:build_app",
         factory=True,
@@ -14,4 +18,12 @@ if __name__ == "__main__":
         interface=Interfaces.ASGI,
         log_level=LogLevels(settings.log_level),
         loop=Loops.uvloop,
+        workers=settings.app_workers,
+        runtime_threads=settings.app_runtime_threads,
+        backpressure=settings.app_backpressure,
+        http=HTTPModes(settings.app_http),
+        http1_settings=HTTP1Settings(keep_alive=settings.app_http1_keep_alive),
+        respawn_failed_workers=settings.app_respawn_failed_workers,
+        workers_lifetime=settings.app_workers_lifetime,
+        workers_max_rss=settings.app_workers_max_rss,
     ).serve()
@@ -0,0 +1,110 @@
+import asyncio
+import dataclasses
+import typing
+
+import litestar
+import modern_di_litestar
+from litestar.enums import ScopeType
+from litestar.exceptions import ServiceUnavailableException
+from litestar.middleware import ASGIMiddleware
+
+from app.resources.replicas import SAFE_METHODS, STICKY_PRIMARY_COOKIE, ReplicaRouter
+from app.settings import settings
+
+
+if typing.TYPE_CHECKING:
+    from litestar.types import ASGIApp, Receive, Scope, Send
+
+
+# route handler opt naming the gate of a route, overriding the choice by method
+ADMISSION_OPT: typing.Final = "admission"
+READ: typing.Final = "read"
+WRITE: typing.Final = "write"
+# reads that always go to the primary, and the reads of clients stuck to it after a write
+PRIMARY_READ: typing.Final = "primary_read"
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class GateStats:
+    admitted: int = 0
+    queued: int = 0
+    rejected: int = 0
+
+
+class Gate:
+    """Admit ``limit`` requests at a time; up to ``queue_size`` more wait at most ``queue_timeout`` seconds."""
+
+    def __init__(self, limit: int, queue_size: int, queue_timeout: float) -> None:
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.stats = GateStats()
+        self._semaphore = asyncio.Semaphore(limit)
+        self._waiting = 0
+
+    async def acquire(self) -> bool:
+        if self._semaphore.locked():
+            if self._waiting >= self.queue_size:
+                self.stats.rejected += 1
+                return False
+            self._waiting += 1
+            self.stats.queued += 1
+            try:
+                async with asyncio.timeout(self.queue_timeout):
+                    await self._semaphore.acquire()
+            except TimeoutError:
+                self.stats.rejected += 1
+                return False
+            finally:
+                self._waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self.stats.admitted += 1
+        return True
+
+    def release(self) -> None:
+        self._semaphore.release()
+
+
+class AdmissionControl:
+    """Gates in front of the DB pool, so a burst is shed with 503 instead of queueing for the pool timeout."""
+
+    def __init__(self, gates: dict[str, Gate], retry_after: int) -> None:
+        self.gates = gates
+        self.retry_after = retry_after
+
+
+def create_admission_control(replicas: ReplicaRouter) -> AdmissionControl:
+    pool_capacity = settings.db_pool_size + settings.db_max_overflow
+    if replicas.engines:
+        # reads are served by the replica pools, the primary pool is left to writes
+        read_capacity, write_capacity = pool_capacity * len(replicas.engines), pool_capacity
+    else:
+        # reads and writes share the primary pool: split it, so together they never admit more than it holds
+        write_capacity = max(pool_capacity // 2, 1)
+        read_capacity = max(pool_capacity - write_capacity, 1)
+    queue = (settings.admission_queue_size, settings.admission_queue_timeout)
+    read = Gate(settings.admission_read_limit or read_capacity, *queue)
+    write = Gate(settings.admission_write_limit or write_capacity, *queue)
+    # primary reads share the gate of whatever else uses the primary pool, so it never admits more than it holds
+    return AdmissionControl(
+        {READ: read, WRITE: write, PRIMARY_READ: write if replicas.engines else read},
+        retry_after=settings.admission_retry_after,
+    )
+
+
+class AdmissionMiddleware(ASGIMiddleware):
+    scopes = (ScopeType.HTTP,)
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send, next_app: ASGIApp) -> None:
+        control = modern_di_litestar.fetch_di_container(scope["litestar_app"]).resolve(AdmissionControl)
+        kind = scope["route_handler"].opt.get(ADMISSION_OPT) or (READ if scope["method"] in SAFE_METHODS else WRITE)
+        if kind == READ and STICKY_PRIMARY_COOKIE in litestar.Request(scope).cookies:
+            kind = PRIMARY_READ
+        gate = control.gates[kind]
+        if not await gate.acquire():
+            raise ServiceUnavailableException(headers={"Retry-After": str(control.retry_after)})
+        try:
+            await next_app(scope, receive, send)
+        finally:
+            gate.release()
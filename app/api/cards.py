@@ -1,41 +1,192 @@
 import typing
 
 import litestar
-from litestar.params import FromPath  # noqa: TC002
+import modern_di_litestar
+from litestar import status_codes
+from litestar.exceptions import HTTPException
+from litestar.params import FromPath, FromQuery  # noqa: TC002
 
-from app import models, schemas
+from app import (
+    admission,
+    cache,
+    changes,
+    conditional,
+    encoding,
+    fieldsets,
+    importing,
+    ioc,
+    models,
+    pagination,
+    query_stats,
+    repositories,
+    schemas,
+    streaming,
+)
 from app.repositories import CardsRepository  # noqa: TC001
+from app.settings import settings
 
 
 @litestar.get("/decks/{deck_id:int}/cards/")
-async def list_cards(deck_id: FromPath[int], cards_repository: CardsRepository) -> schemas.Cards:
-    objects = await cards_repository.list_for_deck(deck_id)
-    return schemas.Cards.from_models(objects)
+async def list_cards(  # noqa: PLR0913
+    request: litestar.Request[typing.Any, typing.Any, typing.Any],
+    deck_id: FromPath[int],
+    cards_repository: CardsRepository,
+    cursor: FromQuery[str | None] = None,
+    limit: pagination.PageLimit = settings.pagination_default_limit,
+    stream: FromQuery[bool] = False,
+    if_none_match: conditional.IfNoneMatch = None,
+    fields: fieldsets.Fields = None,
+) -> litestar.Response[schemas.Cards]:
+    after_id = pagination.decode_cursor(cursor, deck_id)
+    selected = fieldsets.parse(fields, schemas.Card)
+    columns = selected or repositories.CARD_FIELDS
+    card_model = fieldsets.partial_model(schemas.Card, selected)
+    version = await cards_repository.fetch_deck_version(deck_id)
+    # the JSON and NDJSON representations share the version of the deck
+    headers = {**version.headers, "Vary": "Accept"}
+    if version.matches(if_none_match):
+        return conditional.not_modified(headers)
+    media_type = request.accept.best_match([litestar.MediaType.JSON, streaming.NDJSON_MEDIA_TYPE])
+    if stream or media_type == streaming.NDJSON_MEDIA_TYPE:
+        partitions = cards_repository.stream_for_deck(deck_id, after_id, settings.stream_chunk_size, columns)
+        if media_type == streaming.NDJSON_MEDIA_TYPE:
+            content = streaming.encode_ndjson(card_model, partitions)
+        else:
+            content, media_type = streaming.encode_collection(card_model, partitions), litestar.MediaType.JSON
+        return streaming.stream_response(content, media_type, headers)
+    objects = await cards_repository.list_for_deck(deck_id, after_id, limit + 1, columns)
+    page, next_cursor = pagination.build_page(objects, limit, key=lambda x: (x.deck_id, x.id))
+    model = fieldsets.partial_model(schemas.Cards, None, items=list[card_model])
+    return encoding.json_response(encoding.encode(model, {"items": page, "next_cursor": next_cursor}), headers)
+
+
+@litestar.get(
+    "/decks/{deck_id:int}/changes/",
+    # read from the primary, whose running transactions bound the feed; a replica only sees what it replayed
+    dependencies={"cards_repository": modern_di_litestar.FromDI(ioc.Dependencies.cards_primary_reader)},
+    opt={admission.ADMISSION_OPT: admission.PRIMARY_READ},
+)
+async def list_changes(
+    deck_id: FromPath[int],
+    cards_repository: CardsRepository,
+    since: FromQuery[str | None] = None,
+    limit: pagination.PageLimit = settings.pagination_default_limit,
+) -> litestar.Response[schemas.DeckChanges]:
+    """Return the changes of the deck since the ``since`` cursor of the last sync; without one, every card.
+
+    Keep ``next_cursor`` for the next sync, and fetch again with it right away while ``has_more`` is set. Changes
+    show up once every transaction that started before them is over.
+    """
+    cursor = changes.ChangesCursor.decode(since, deck_id)
+    cards, tombstones = await cards_repository.list_changes(deck_id, cursor, limit + 1)
+    has_more = len(cards) > limit or len(tombstones) > limit
+    cards, tombstones = cards[:limit], tombstones[:limit]
+    document = {
+        "cards": cards,
+        "deleted": [x.card_id for x in tombstones],
+        "next_cursor": cursor.advance(cards, tombstones).encode(deck_id),
+        "has_more": has_more,
+    }
+    return encoding.json_response(encoding.encode(schemas.DeckChanges, document))
+
+
+def _card_version(instance: models.Card) -> conditional.Version:
+    return conditional.Version(xact_id=instance.xact_id, count=1, updated_at=instance.updated_at)
 
 
-@litestar.get("/cards/{card_id:int}/")
-async def get_card(card_id: FromPath[int], cards_repository: CardsRepository) -> schemas.Card:
-    instance = await cards_repository.get_one(models.Card.id == card_id)
-    return schemas.Card.model_validate(instance)
+@litestar.get(
+    "/cards/{card_id:int}/",
+    dependencies={"cards_repository": modern_di_litestar.FromDI(ioc.Dependencies.cards_primary_reader)},
+    opt={admission.ADMISSION_OPT: admission.PRIMARY_READ},
+)
+async def get_card(
+    card_id: FromPath[int],
+    cards_repository: CardsRepository,
+    response_cache: cache.ResponseCache,
+    if_none_match: conditional.IfNoneMatch = None,
+    fields: fieldsets.Fields = None,
+) -> litestar.Response[schemas.Card]:
+    key = cache.card_key(card_id)
+    if if_none_match is not None:
+        # a cached body answers with its own ETag; only a miss reads the version from the card row
+        cached = response_cache.get(key)
+        headers = cached.headers if cached is not None else (await cards_repository.fetch_version(card_id)).headers
+        if conditional.matches(headers["ETag"], if_none_match):
+            return conditional.not_modified(headers)
+
+    if (selected := fieldsets.parse(fields, schemas.Card)) is not None:
+        # sparse cards are not cached, they load only the selected columns instead
+        instance = await cards_repository.fetch_card(card_id, selected)
+        return encoding.json_response(
+            encoding.encode(fieldsets.partial_model(schemas.Card, selected), instance),
+            _card_version(instance).headers,
+        )
+
+    async def load() -> cache.CachedResponse:
+        instance = await cards_repository.get_one(models.Card.id == card_id)
+        return cache.CachedResponse(
+            content=encoding.encode(schemas.Card, instance),
+            deck_id=instance.deck_id,
+            headers=_card_version(instance).headers,
+        )
+
+    cached = await response_cache.fetch(key, load)
+    return cached.to_response()
 
 
-@litestar.post("/decks/{deck_id:int}/cards/")
+# one statement per batch of rows
+@litestar.post("/decks/{deck_id:int}/cards/", opt={query_stats.QUERY_BUDGET_OPT: 100})
 async def create_cards(
-    deck_id: FromPath[int], data: list[schemas.CardCreate], cards_repository: CardsRepository
-) -> schemas.Cards:
+    deck_id: FromPath[int],
+    data: list[schemas.CardCreate],
+    cards_repository: CardsRepository,
+    response_cache: cache.ResponseCache,
+) -> schemas.CardsWritten:
     objects = await cards_repository.add_cards(deck_id, data)
-    return schemas.Cards.from_models(objects)
+    response_cache.invalidate_deck(deck_id)
+    return schemas.CardsWritten.from_models(objects)
 
 
-@litestar.put("/decks/{deck_id:int}/cards/")
+@litestar.put("/decks/{deck_id:int}/cards/", opt={query_stats.QUERY_BUDGET_OPT: 100})
 async def update_cards(
-    deck_id: FromPath[int], data: list[schemas.Card], cards_repository: CardsRepository
-) -> schemas.Cards:
-    objects = await cards_repository.upsert_cards(deck_id, data)
-    return schemas.Cards.from_models(objects)
+    deck_id: FromPath[int],
+    data: list[schemas.Card],
+    cards_repository: CardsRepository,
+    response_cache: cache.ResponseCache,
+) -> schemas.CardsUpsert:
+    result = await cards_repository.upsert_cards(deck_id, data)
+    response_cache.invalidate_deck(deck_id, *result.moved_from)
+    response_cache.invalidate(*(cache.card_key(x.id) for x in data))
+    return schemas.CardsUpsert.from_models(
+        result.cards, changed=result.changed, unchanged=len(result.cards) - result.changed
+    )
+
+
+@litestar.post(
+    "/decks/{deck_id:int}/cards/import/",
+    status_code=status_codes.HTTP_200_OK,
+    request_max_body_size=settings.import_max_body_size,
+)
+async def import_cards(
+    request: litestar.Request[typing.Any, typing.Any, typing.Any],
+    deck_id: FromPath[int],
+    cards_repository: CardsRepository,
+    response_cache: cache.ResponseCache,
+) -> schemas.CardsImport:
+    """Bulk import a CSV (with a header row) or NDJSON body of cards, streamed through COPY."""
+    media_type, _ = request.content_type
+    if media_type not in importing.MEDIA_TYPES:
+        raise HTTPException(status_code=status_codes.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+    cards_import = importing.CardsImport(media_type)
+    inserted = await cards_repository.import_cards(deck_id, cards_import.records(request.stream()))
+    response_cache.invalidate_deck(deck_id)
+    return schemas.CardsImport(
+        inserted=inserted, updated=cards_import.accepted - inserted, rejected=cards_import.rejected
+    )
 
 
 ROUTER: typing.Final = litestar.Router(
     path="/api",
-    route_handlers=[list_cards, get_card, create_cards, update_cards],
+    middleware=[admission.AdmissionMiddleware(), query_stats.QueryStatsMiddleware()],
+    route_handlers=[list_cards, list_changes, get_card, create_cards, update_cards, import_cards],
 )
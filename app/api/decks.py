@@ -1,22 +1,101 @@
 import typing
 
 import litestar
-from litestar.params import FromPath  # noqa: TC002
+import modern_di_litestar
+from litestar.params import FromPath, FromQuery, QueryParameter
 
-from app import schemas
+from app import (
+    admission,
+    cache,
+    conditional,
+    encoding,
+    fieldsets,
+    ioc,
+    models,
+    pagination,
+    query_stats,
+    repositories,
+    schemas,
+)
 from app.repositories import DecksRepository  # noqa: TC001
+from app.settings import settings
 
 
 @litestar.get("/decks/")
-async def list_decks(decks_repository: DecksRepository) -> schemas.Decks:
-    objects = await decks_repository.get_many()
-    return schemas.Decks.from_models(objects)
+async def list_decks(
+    decks_repository: DecksRepository,
+    cursor: FromQuery[str | None] = None,
+    limit: pagination.PageLimit = settings.pagination_default_limit,
+    fields: fieldsets.Fields = None,
+) -> litestar.Response[schemas.Decks]:
+    after_id = pagination.decode_cursor(cursor)
+    selected = fieldsets.parse(fields, schemas.Deck)
+    objects = await decks_repository.list_page(after_id, limit + 1, selected or repositories.DECK_FIELDS)
+    page, next_cursor = pagination.build_page(objects, limit, key=lambda x: (x.id,))
+    model = fieldsets.partial_model(schemas.Decks, None, items=list[fieldsets.partial_model(schemas.Deck, selected)])
+    return encoding.json_response(encoding.encode(model, {"items": page, "next_cursor": next_cursor}))
 
 
-@litestar.get("/decks/{deck_id:int}/")
-async def get_deck(deck_id: FromPath[int], decks_repository: DecksRepository) -> schemas.DeckWithCards:
-    instance = await decks_repository.fetch_with_cards(deck_id)
-    return schemas.DeckWithCards.model_validate(instance)
+DeckIds = typing.Annotated[list[int], QueryParameter(min_items=1, max_items=settings.deck_batch_max_size)]
+
+
+@litestar.get("/decks/batch/")
+async def get_decks_batch(ids: DeckIds, decks_repository: DecksRepository) -> schemas.DecksBatch:
+    requested = list(dict.fromkeys(ids))
+    found = {x.id: x for x in await decks_repository.fetch_many_with_cards(requested)}
+    return schemas.DecksBatch.model_validate({"items": {deck_id: found.get(deck_id) for deck_id in requested}})
+
+
+def _deck_version(instance: models.Deck) -> conditional.Version:
+    return conditional.Version(
+        xact_id=instance.xact_id,
+        count=instance.card_count,
+        updated_at=max(x.updated_at for x in (instance, *instance.cards)),
+    )
+
+
+@litestar.get(
+    "/decks/{deck_id:int}/",
+    dependencies={"decks_repository": modern_di_litestar.FromDI(ioc.Dependencies.decks_primary_reader)},
+    opt={admission.ADMISSION_OPT: admission.PRIMARY_READ},
+)
+async def get_deck(  # noqa: PLR0913
+    deck_id: FromPath[int],
+    decks_repository: DecksRepository,
+    response_cache: cache.ResponseCache,
+    if_none_match: conditional.IfNoneMatch = None,
+    fields: fieldsets.Fields = None,
+    card_fields: fieldsets.Fields = None,
+) -> litestar.Response[schemas.DeckWithCards]:
+    key = cache.deck_key(deck_id)
+    if if_none_match is not None:
+        # a cached body answers with its own ETag; only a miss reads the version from the deck row
+        cached = response_cache.get(key)
+        headers = cached.headers if cached is not None else (await decks_repository.fetch_version(deck_id)).headers
+        if conditional.matches(headers["ETag"], if_none_match):
+            return conditional.not_modified(headers)
+
+    selected = fieldsets.parse(fields, schemas.DeckWithCards)
+    selected_cards = fieldsets.parse(card_fields, schemas.Card)
+    if selected is not None or selected_cards is not None:
+        # sparse documents are not cached, they load only the selected columns instead
+        instance = await decks_repository.fetch_with_cards(deck_id, selected, selected_cards)
+        model = fieldsets.partial_model(
+            schemas.DeckWithCards, selected, cards=list[fieldsets.partial_model(schemas.Card, selected_cards)]
+        )
+        return encoding.json_response(encoding.encode(model, instance), _deck_version(instance).headers)
+
+    async def load() -> cache.CachedResponse:
+        if settings.deck_json_from_database:
+            content, version = await decks_repository.fetch_document(deck_id)
+        else:
+            instance = await decks_repository.fetch_with_cards(deck_id)
+            content = schemas.DeckWithCards.model_validate(instance).model_dump_json().encode()
+            version = _deck_version(instance)
+        return cache.CachedResponse(content=content, deck_id=deck_id, headers=version.headers)
+
+    cached = await response_cache.fetch(key, load)
+    return cached.to_response()
 
 
 @litestar.put("/decks/{deck_id:int}/")
@@ -24,8 +103,10 @@ async def update_deck(
     deck_id: FromPath[int],
     data: schemas.DeckCreate,
     decks_repository: DecksRepository,
+    response_cache: cache.ResponseCache,
 ) -> schemas.Deck:
-    instance = await decks_repository.update(data=data.model_dump(), item_id=deck_id)
+    instance = await decks_repository.update_deck(deck_id, data)
+    response_cache.invalidate_deck(deck_id)
     return schemas.Deck.model_validate(instance)
 
 
@@ -35,7 +116,18 @@ async def create_deck(data: schemas.DeckCreate, decks_repository: DecksRepositor
     return schemas.Deck.model_validate(instance)
 
 
+# one statement for the deck and one per thousand cards
+@litestar.post("/decks/with-cards/", opt={query_stats.QUERY_BUDGET_OPT: 100})
+async def create_deck_with_cards(
+    data: schemas.DeckWithCardsCreate, decks_repository: DecksRepository
+) -> schemas.DeckWithCards:
+    """Create the deck with its cards at once; on any error nothing is created."""
+    instance = await decks_repository.create_with_cards(data)
+    return schemas.DeckWithCards.model_validate(instance)
+
+
 ROUTER: typing.Final = litestar.Router(
     path="/api",
-    route_handlers=[list_decks, get_deck, update_deck, create_deck],
+    middleware=[admission.AdmissionMiddleware(), query_stats.QueryStatsMiddleware()],
+    route_handlers=[list_decks, get_decks_batch, get_deck, update_deck, create_deck, create_deck_with_cards],
 )
@@ -1,25 +1,98 @@
+import asyncio
 import dataclasses
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
+import litestar
 import modern_di
 import modern_di_litestar
 from advanced_alchemy.exceptions import DuplicateKeyError, NotFoundError
 from lite_bootstrap import LitestarBootstrapper
+from litestar import status_codes
 from litestar.config.app import AppConfig
-from opentelemetry.instrumentation.asyncpg import AsyncPGInstrumentor
-from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+from litestar.datastructures import Cookie, MutableScopeHeaders
+from litestar.di import NamedDependency, Provide
+from litestar.params import SkipValidation  # noqa: TC002
 
-from app import exceptions, ioc, repositories
+from app import cache, exceptions, ioc, warm_up
 from app.api import cards, decks
+from app.resources.notifications import DeckChangesListener
+from app.resources.pool_health import PoolHealthChecker
+from app.resources.pool_metrics import mark_worker_dead, setup_meter_provider
+from app.resources.replicas import SAFE_METHODS, STICKY_PRIMARY_COOKIE
 from app.settings import settings
 
 
 if TYPE_CHECKING:
-    import litestar
+    from litestar.types import Message, Scope
+    from modern_di import providers
+    from opentelemetry.instrumentation.instrumentor import BaseInstrumentor
+
+
+async def warm_up_pools(app: litestar.Litestar) -> None:
+    if not settings.db_pool_warm_up:
+        return
+    di_container = modern_di_litestar.fetch_di_container(app)
+    engines = [di_container.resolve_provider(ioc.Dependencies.database_engine)]
+    engines += di_container.resolve_provider(ioc.Dependencies.replica_router).engines
+    await asyncio.gather(*(warm_up.warm_up_pool(engine) for engine in engines))
+
+
+async def check_pool_health(app: litestar.Litestar) -> None:
+    if settings.db_pool_liveness == "background":
+        modern_di_litestar.fetch_di_container(app).resolve(PoolHealthChecker).start()
+
+
+async def listen_deck_changes(app: litestar.Litestar) -> None:
+    di_container = modern_di_litestar.fetch_di_container(app)
+    listener = di_container.resolve(DeckChangesListener)
+    response_cache = di_container.resolve(cache.ResponseCache)
+    listener.subscribe(response_cache.invalidate_deck, on_reconnect=response_cache.clear)
+    await listener.start()
+
+
+async def stick_to_primary(message: Message, scope: Scope) -> None:
+    """Send a client's reads to the primary for a while after it writes, so replica lag never hides its writes."""
+    if (
+        message["type"] == "http.response.start"
+        and scope.get("method") not in SAFE_METHODS
+        and message["status"] < status_codes.HTTP_400_BAD_REQUEST
+    ):
+        cookie = Cookie(key=STICKY_PRIMARY_COOKIE, value="1", max_age=settings.db_sticky_primary_seconds, httponly=True)
+        MutableScopeHeaders(message).add("set-cookie", cookie.to_header(header=""))
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class _ByMethod:
+    writer: providers.AbstractProvider[Any]
+    reader: providers.AbstractProvider[Any]
+
+    async def __call__(
+        self,
+        request: litestar.Request[Any, Any, Any],
+        di_container: NamedDependency[SkipValidation[modern_di.Container]],
+    ) -> Any:  # noqa: ANN401
+        provider = self.reader if request.method in SAFE_METHODS else self.writer
+        return di_container.resolve_provider(provider)
+
+
+def by_method(writer: providers.AbstractProvider[Any], reader: providers.AbstractProvider[Any]) -> Provide:
+    """Resolve ``reader`` for safe-method requests and ``writer`` for the rest."""
+    return Provide(dependency=_ByMethod(writer, reader), use_cache=False)
+
+
+def opentelemetry_instrumentors() -> list[BaseInstrumentor]:
+    # imported only when tracing is configured, instrumentation packages are slow to import
+    if not settings.opentelemetry_endpoint:
+        return []
+    from opentelemetry.instrumentation.asyncpg import AsyncPGInstrumentor  # noqa: PLC0415
+    from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor  # noqa: PLC0415
+
+    return [SQLAlchemyInstrumentor(), AsyncPGInstrumentor(capture_parameters=True)]
 
 
 def build_app() -> litestar.Litestar:
     di_container = modern_di.Container(groups=[ioc.Dependencies])
+    setup_meter_provider(settings.opentelemetry_endpoint)
     bootstrap_config = dataclasses.replace(
         settings.api_bootstrapper_config,
         application_config=AppConfig(
@@ -30,15 +103,16 @@ def build_app() -> litestar.Litestar:
             route_handlers=[decks.ROUTER, cards.ROUTER],
             plugins=[modern_di_litestar.ModernDIPlugin(di_container)],
             dependencies={
-                "decks_repository": modern_di_litestar.FromDI(repositories.DecksRepository),
-                "cards_repository": modern_di_litestar.FromDI(repositories.CardsRepository),
+                "decks_repository": by_method(ioc.Dependencies.decks_repository, ioc.Dependencies.decks_reader),
+                "cards_repository": by_method(ioc.Dependencies.cards_repository, ioc.Dependencies.cards_reader),
+                "response_cache": modern_di_litestar.FromDI(cache.ResponseCache),
             },
             request_max_body_size=settings.request_max_body_size,
+            on_startup=[warm_up_pools, check_pool_health, listen_deck_changes],
+            on_shutdown=[mark_worker_dead],
+            before_send=[stick_to_primary] if settings.db_replica_dsns and settings.db_sticky_primary_seconds else [],
         ),
-        opentelemetry_instrumentors=[
-            SQLAlchemyInstrumentor(),
-            AsyncPGInstrumentor(capture_parameters=True),
-        ],
+        opentelemetry_instrumentors=opentelemetry_instrumentors(),
     )
     bootstrapper = LitestarBootstrapper(bootstrap_config=bootstrap_config)
     return bootstrapper.bootstrap()
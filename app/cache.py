@@ -0,0 +1,144 @@
+import asyncio
+import collections
+import dataclasses
+import time
+import typing
+
+from app import encoding
+
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    import litestar
+
+
+type CacheKey = tuple[str, int]
+
+
+def deck_key(deck_id: int) -> CacheKey:
+    return ("deck", deck_id)
+
+
+def card_key(card_id: int) -> CacheKey:
+    return ("card", card_id)
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    # misses served by joining a load already in flight for the same key
+    coalesced: int = 0
+
+
+@dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
+class CachedResponse:
+    content: bytes
+    deck_id: int
+    headers: dict[str, str] = dataclasses.field(default_factory=dict)
+
+    def to_response(self) -> litestar.Response[typing.Any]:
+        return encoding.json_response(self.content, self.headers)
+
+
+def _retrieve_exception(future: asyncio.Future[CachedResponse]) -> None:
+    # a load error is re-raised by the leader, followers are optional
+    if not future.cancelled():
+        future.exception()
+
+
+class ResponseCache:
+    """Bounded LRU+TTL cache of serialized response bodies, shared by all requests of a worker.
+
+    Concurrent misses for one key are coalesced: the first request loads the body, the others await its result.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries: collections.OrderedDict[CacheKey, tuple[float, CachedResponse]] = collections.OrderedDict()
+        # bumped by every invalidation so a load that raced with a write is not stored
+        self._version = 0
+        self._in_flight: dict[CacheKey, tuple[int, asyncio.Future[CachedResponse]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: CacheKey) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        expires_at, cached = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.stats.evictions += 1
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return cached
+
+    def set(self, key: CacheKey, cached: CachedResponse) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, cached)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def invalidate(self, *keys: CacheKey) -> None:
+        self._version += 1
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def invalidate_deck(self, *deck_ids: int) -> None:
+        """Drop the decks and every cached card that belongs to them."""
+        self._version += 1
+        for key in [key for key, (_, cached) in self._entries.items() if cached.deck_id in deck_ids]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        """Drop every entry, for when invalidations may have been missed."""
+        self._version += 1
+        self._entries.clear()
+
+    async def fetch(self, key: CacheKey, load: Callable[[], Awaitable[CachedResponse]]) -> CachedResponse:
+        while (cached := self.get(key)) is None:
+            version, in_flight = self._in_flight.get(key, (None, None))
+            # a load started before the latest invalidation may miss a write this request must see
+            if in_flight is None or version != self._version:
+                return await self._load(key, load)
+            self.stats.coalesced += 1
+            try:
+                # shielded: a follower that is cancelled must not cancel the leader's load
+                return await asyncio.shield(in_flight)
+            except asyncio.CancelledError:
+                current_task = asyncio.current_task()
+                if not in_flight.cancelled() or (current_task is not None and current_task.cancelling()):
+                    raise
+                # the leader was cancelled, retry and let one of the followers load instead
+        return cached
+
+    async def _load(self, key: CacheKey, load: Callable[[], Awaitable[CachedResponse]]) -> CachedResponse:
+        version = self._version
+        future: asyncio.Future[CachedResponse] = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_retrieve_exception)
+        self._in_flight[key] = (version, future)
+        try:
+            cached = await load()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            if self._in_flight.get(key, (None, None))[1] is future:
+                del self._in_flight[key]
+        future.set_result(cached)
+        if version == self._version:
+            self.set(key, cached)
+        return cached
@@ -0,0 +1,52 @@
+import dataclasses
+import typing
+
+from app import pagination
+
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    import sqlalchemy as sa
+
+
+@dataclasses.dataclass(frozen=True, slots=True, kw_only=True)
+class Position:
+    """Last change seen in a feed, in commit order: by the writing transaction, then by row id."""
+
+    xact_id: int = 0
+    id: int = 0
+
+
+@dataclasses.dataclass(frozen=True, slots=True, kw_only=True)
+class ChangesCursor:
+    """Position of a client in the change feed of a deck: in the changed cards and in the tombstones."""
+
+    cards: Position = Position()
+    tombstones: Position = Position()
+
+    def encode(self, deck_id: int) -> str:
+        return pagination.encode_cursor(
+            deck_id, self.cards.xact_id, self.cards.id, self.tombstones.xact_id, self.tombstones.id
+        )
+
+    @classmethod
+    def decode(cls, cursor: str | None, deck_id: int) -> typing.Self:
+        """Read ``cursor`` of the deck; without one the feed starts over and returns every card."""
+        if cursor is None:
+            return cls()
+        card_xact_id, card_id, tombstone_xact_id, tombstone_id = pagination.decode_key(cursor, 4, deck_id)
+        return cls(
+            cards=Position(xact_id=card_xact_id, id=card_id),
+            tombstones=Position(xact_id=tombstone_xact_id, id=tombstone_id),
+        )
+
+    def advance(self, cards: Sequence[sa.Row[typing.Any]], tombstones: Sequence[sa.Row[typing.Any]]) -> typing.Self:
+        """Move past the last of the returned ``cards`` and ``tombstones``, each feed on its own."""
+        return dataclasses.replace(
+            self, cards=_last(cards) or self.cards, tombstones=_last(tombstones) or self.tombstones
+        )
+
+
+def _last(rows: Sequence[sa.Row[typing.Any]]) -> Position | None:
+    return Position(xact_id=rows[-1].xact_id, id=rows[-1].id) if rows else None
@@ -0,0 +1,56 @@
+import dataclasses
+import datetime
+import email.utils
+import typing
+
+import litestar
+from litestar import status_codes
+from litestar.params import HeaderParameter
+
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Mapping
+
+
+IfNoneMatch = typing.Annotated[str | None, HeaderParameter(name="if-none-match")]
+
+
+def matches(etag: str, if_none_match: str | None) -> bool:
+    if if_none_match is None:
+        return False
+    # If-None-Match always uses the weak comparison
+    candidates = {x.strip().removeprefix("W/") for x in if_none_match.split(",")}
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+@dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
+class Version:
+    """Version of a representation: the transaction that last wrote its rows and how many rows it has.
+
+    ``xact_id`` is set by triggers inside the writing transaction, so a reader never sees a version whose rows it
+    cannot see yet; ``updated_at`` is assigned before the commit and only feeds Last-Modified, where it is at hand.
+    """
+
+    xact_id: int
+    count: int
+    updated_at: datetime.datetime | None = None
+
+    @property
+    def etag(self) -> str:
+        return f'W/"{self.count}-{self.xact_id}"'
+
+    @property
+    def headers(self) -> dict[str, str]:
+        headers = {"ETag": self.etag}
+        if self.updated_at is not None:
+            headers["Last-Modified"] = email.utils.format_datetime(
+                self.updated_at.astimezone(datetime.UTC), usegmt=True
+            )
+        return headers
+
+    def matches(self, if_none_match: str | None) -> bool:
+        return matches(self.etag, if_none_match)
+
+
+def not_modified(headers: Mapping[str, str]) -> litestar.Response[typing.Any]:
+    return litestar.Response(None, status_code=status_codes.HTTP_304_NOT_MODIFIED, headers=headers)
@@ -0,0 +1,49 @@
+import functools
+import typing
+
+import litestar
+import msgspec
+import pydantic
+
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+
+
+_ENCODER: typing.Final = msgspec.json.Encoder()
+
+
+def _struct_annotation(annotation: typing.Any) -> typing.Any:  # noqa: ANN401
+    if isinstance(annotation, type) and issubclass(annotation, pydantic.BaseModel):
+        return struct_for(annotation)
+    if typing.get_origin(annotation) is list:
+        (item,) = typing.get_args(annotation)
+        return list[_struct_annotation(item)]
+    return annotation
+
+
+@functools.cache
+def struct_for(model: type[pydantic.BaseModel]) -> type[msgspec.Struct]:
+    """Mirror ``model`` as a msgspec Struct with the same fields in the same order, so both encode alike."""
+    fields = [
+        (name, _struct_annotation(field.annotation))
+        if field.is_required()
+        else (name, _struct_annotation(field.annotation), field.default)
+        for name, field in model.model_fields.items()
+    ]
+    return msgspec.defstruct(model.__name__, fields, kw_only=True)
+
+
+def encode(model: type[pydantic.BaseModel], obj: object) -> bytes:
+    """Encode ``obj`` (a mapping, ORM object or row) in the JSON shape of ``model`` without pydantic validation."""
+    return _ENCODER.encode(msgspec.convert(obj, struct_for(model), from_attributes=True))
+
+
+def encode_many(model: type[pydantic.BaseModel], objects: Iterable[object]) -> list[bytes]:
+    struct = struct_for(model)
+    return [_ENCODER.encode(msgspec.convert(obj, struct, from_attributes=True)) for obj in objects]
+
+
+def json_response(content: bytes, headers: Mapping[str, str] | None = None) -> litestar.Response[typing.Any]:
+    """Send the already encoded ``content`` as is; handlers declare the schema it follows as their return type."""
+    return litestar.Response(content, media_type=litestar.MediaType.JSON, headers=headers)
@@ -0,0 +1,43 @@
+import functools
+import typing
+
+import pydantic
+from litestar.exceptions import ValidationException
+from litestar.params import QueryParameter
+
+from app import schemas
+
+
+INVALID_FIELDS_DETAIL: typing.Final = "Invalid fields"
+
+# comma-separated names of the fields to return, e.g. ``?fields=id,front``; all fields when absent
+Fields = typing.Annotated[str | None, QueryParameter(pattern=r"^[a-z_]+(,[a-z_]+)*$")]
+
+
+def parse(value: str | None, model: type[schemas.Base]) -> tuple[str, ...] | None:
+    """Validate ``value`` against the fields of ``model``; return them in the order of the schema."""
+    if value is None:
+        return None
+    requested = set(value.split(","))
+    if unknown := requested - model.model_fields.keys():
+        msg = f"{INVALID_FIELDS_DETAIL}: {', '.join(sorted(unknown))}"
+        raise ValidationException(msg)
+    return tuple(name for name in model.model_fields if name in requested)
+
+
+@functools.cache
+def partial_model(
+    model: type[schemas.Base], fields: tuple[str, ...] | None, **annotations: object
+) -> type[schemas.Base]:
+    """Reduce ``model`` to ``fields`` (all when ``None``), replacing the annotations of some of them.
+
+    Nested partial models are passed as annotations, e.g. ``items=list[partial_model(schemas.Card, fields)]``.
+    """
+    if fields is None and not annotations:
+        return model
+    definitions: dict[str, typing.Any] = {
+        name: (annotations.get(name, field.annotation), ... if field.is_required() else field.default)
+        for name, field in model.model_fields.items()
+        if fields is None or name in fields
+    }
+    return pydantic.create_model(model.__name__, __base__=schemas.Base, **definitions)
@@ -0,0 +1,129 @@
+import codecs
+import csv
+import typing
+
+import greenlet
+import pydantic
+from litestar.exceptions import ValidationException
+
+from app import schemas, streaming
+
+
+if typing.TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterator
+
+
+CSV_MEDIA_TYPE: typing.Final = "text/csv"
+MEDIA_TYPES: typing.Final = (CSV_MEDIA_TYPE, streaming.NDJSON_MEDIA_TYPE)
+INVALID_ENCODING_DETAIL: typing.Final = "Body is not valid UTF-8"
+MISSING_FRONT_DETAIL: typing.Final = "CSV header has no front column"
+INVALID_HEADER_DETAIL: typing.Final = "CSV header is not valid CSV"
+
+type Record = tuple[int, str, str | None, str | None]
+
+_NEED_LINE: typing.Final = object()
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    tail = ""
+    try:
+        async for chunk in chunks:
+            *lines, tail = (tail + decoder.decode(chunk)).split("\n")
+            for line in lines:
+                yield line
+        tail += decoder.decode(b"", final=True)
+    except UnicodeDecodeError as exc:
+        raise ValidationException(INVALID_ENCODING_DETAIL) from exc
+    if tail:
+        yield tail
+
+
+class _CsvRows:
+    """One ``csv.reader`` over lines that arrive asynchronously, so the csv module alone decides where records end.
+
+    The reader pulls lines from a plain iterator. It runs in a greenlet that switches back to ``next_row`` whenever it
+    needs another line, and ``next_row`` awaits the line and switches back.
+    """
+
+    def __init__(self, lines: AsyncIterator[str]) -> None:
+        self._lines = lines
+        self._reader = csv.reader(self._source())
+        self._waiting = greenlet.getcurrent()
+
+    def _source(self) -> Iterator[str]:
+        # the reader keeps line breaks inside quoted fields only when lines end with them
+        while (line := self._waiting.switch(_NEED_LINE)) is not None:
+            yield line + "\n"
+
+    async def next_row(self) -> list[str] | None:
+        """Return the next row, ``None`` after the last one; raise ``csv.Error`` for a malformed one."""
+        self._waiting = greenlet.getcurrent()
+        reading = greenlet.greenlet(lambda: next(self._reader, None))
+        result = reading.switch()
+        while result is _NEED_LINE:
+            result = reading.switch(await anext(self._lines, None))
+        return result
+
+
+class CardsImport:
+    """Validates an import body row by row into ``(seq, front, back, hint)`` COPY records."""
+
+    def __init__(self, media_type: str) -> None:
+        self.media_type = media_type
+        self.accepted = 0
+        self.rejected = 0
+
+    def _accept(self, card: schemas.CardCreate) -> Record:
+        self.accepted += 1
+        return (self.accepted, card.front, card.back, card.hint)
+
+    async def records(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+        lines = iter_lines(chunks)
+        if self.media_type == CSV_MEDIA_TYPE:
+            async for record in self._csv_records(lines):
+                yield record
+        else:
+            async for record in self._ndjson_records(lines):
+                yield record
+
+    async def _csv_records(self, lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+        rows = _CsvRows(lines)
+        try:
+            header = [x.strip() for x in await rows.next_row() or []]
+        except csv.Error as exc:
+            raise ValidationException(INVALID_HEADER_DETAIL) from exc
+        if "front" not in header:
+            raise ValidationException(MISSING_FRONT_DETAIL)
+        while True:
+            try:
+                row = await rows.next_row()
+            except csv.Error:
+                # the reader skips the malformed record and goes on with the next one
+                self.rejected += 1
+                continue
+            if row is None:
+                break
+            if not any(row):
+                continue
+            if len(row) != len(header):
+                self.rejected += 1
+                continue
+            try:
+                # CSV has no null, an empty cell stands for a missing value
+                card = schemas.CardCreate.model_validate({k: v for k, v in zip(header, row, strict=True) if v})
+            except pydantic.ValidationError:
+                self.rejected += 1
+                continue
+            yield self._accept(card)
+
+    async def _ndjson_records(self, lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+        async for line in lines:
+            if not line.strip():
+                continue
+            try:
+                card = schemas.CardCreate.model_validate_json(line)
+            except pydantic.ValidationError:
+                self.rejected += 1
+                continue
+            yield self._accept(card)
@@ -1,7 +1,21 @@
 from modern_di import Group, Scope, providers
+from modern_di_litestar import litestar_request_provider
 
+from app.admission import create_admission_control
+from app.cache import ResponseCache
 from app.repositories import CardsRepository, DecksRepository
-from app.resources.db import close_sa_engine, close_session, create_sa_engine, create_session
+from app.resources.db import (
+    close_sa_engine,
+    close_session,
+    create_read_engine,
+    create_read_only_session,
+    create_sa_engine,
+    create_session,
+)
+from app.resources.notifications import DeckChangesListener
+from app.resources.pool_health import PoolHealthChecker, create_pool_health_checker
+from app.resources.replicas import close_replica_router, create_read_session, create_replica_router
+from app.settings import settings
 
 
 class Dependencies(Group):
@@ -12,6 +26,32 @@ class Dependencies(Group):
         scope=Scope.REQUEST, creator=create_session, cache_settings=providers.CacheSettings(finalizer=close_session)
     )
 
+    # bound_type=None: resolved by provider only, the primary engine and session keep their types
+    read_engine = providers.Factory(
+        creator=create_read_engine,
+        bound_type=None,
+        kwargs={"engine": database_engine},
+        cache_settings=providers.CacheSettings(),
+    )
+    replica_router = providers.Factory(
+        creator=create_replica_router, cache_settings=providers.CacheSettings(finalizer=close_replica_router)
+    )
+    read_session = providers.Factory(
+        scope=Scope.REQUEST,
+        creator=create_read_session,
+        bound_type=None,
+        kwargs={"engine": read_engine, "replicas": replica_router, "request": litestar_request_provider},
+        cache_settings=providers.CacheSettings(finalizer=close_session),
+    )
+    # read-only sessions on the primary, for reads that replica lag must not reach (bodies kept in the cache)
+    primary_read_session = providers.Factory(
+        scope=Scope.REQUEST,
+        creator=create_read_only_session,
+        bound_type=None,
+        kwargs={"engine": read_engine},
+        cache_settings=providers.CacheSettings(finalizer=close_session),
+    )
+
     decks_repository = providers.Factory(
         scope=Scope.REQUEST,
         creator=DecksRepository,
@@ -22,3 +62,45 @@ class Dependencies(Group):
         creator=CardsRepository,
         kwargs={"auto_commit": True, "session": session},
     )
+
+    decks_reader = providers.Factory(
+        scope=Scope.REQUEST,
+        creator=DecksRepository,
+        bound_type=None,
+        kwargs={"auto_commit": False, "session": read_session},
+    )
+    cards_reader = providers.Factory(
+        scope=Scope.REQUEST,
+        creator=CardsRepository,
+        bound_type=None,
+        kwargs={"auto_commit": False, "session": read_session},
+    )
+    # readers of the primary for the cached get_deck and get_card bodies, which a replica lagging behind an
+    # invalidation would refill with the old body, and for the change feed
+    decks_primary_reader = providers.Factory(
+        scope=Scope.REQUEST,
+        creator=DecksRepository,
+        bound_type=None,
+        kwargs={"auto_commit": False, "session": primary_read_session},
+    )
+    cards_primary_reader = providers.Factory(
+        scope=Scope.REQUEST,
+        creator=CardsRepository,
+        bound_type=None,
+        kwargs={"auto_commit": False, "session": primary_read_session},
+    )
+
+    response_cache = providers.Factory(
+        creator=ResponseCache,
+        kwargs={"max_size": settings.cache_max_size, "ttl": settings.cache_ttl},
+        cache_settings=providers.CacheSettings(),
+    )
+    admission_control = providers.Factory(creator=create_admission_control, cache_settings=providers.CacheSettings())
+    deck_changes_listener = providers.Factory(
+        creator=DeckChangesListener,
+        cache_settings=providers.CacheSettings(finalizer=DeckChangesListener.stop),
+    )
+    pool_health_checker = providers.Factory(
+        creator=create_pool_health_checker,
+        cache_settings=providers.CacheSettings(finalizer=PoolHealthChecker.stop),
+    )
@@ -14,14 +14,37 @@ class Deck(BigIntAuditBase):
 
     name: orm.Mapped[str] = orm.mapped_column(sa.String, nullable=False)
     description: orm.Mapped[str | None] = orm.mapped_column(sa.String, nullable=True)
-    cards: orm.Mapped[list[Card]] = orm.relationship("Card", lazy="noload", uselist=True)
+    # maintained by statement-level triggers on cards (see the decks_card_count migration), never by the ORM
+    card_count: orm.Mapped[int] = orm.mapped_column(sa.Integer, nullable=False, server_default="0")
+    # id of the transaction that last wrote the deck or any of its cards, set by triggers (see the decks_xact_id
+    # migration)
+    xact_id: orm.Mapped[int] = orm.mapped_column(sa.BigInteger, nullable=False, server_default="0")
+    cards: orm.Mapped[list[Card]] = orm.relationship("Card", lazy="noload", uselist=True, order_by="Card.id")
 
 
 class Card(BigIntAuditBase):
     __tablename__ = "cards"
-    __table_args__ = (sa.UniqueConstraint("deck_id", "front", name="card_deck_id_front_uc"),)
+    __table_args__ = (
+        sa.UniqueConstraint("deck_id", "front", name="card_deck_id_front_uc"),
+        sa.Index("ix_cards_deck_id_id", "deck_id", "id"),
+        sa.Index("ix_cards_deck_id_xact_id_id", "deck_id", "xact_id", "id"),
+    )
 
     front: orm.Mapped[str] = orm.mapped_column(sa.String, nullable=False)
     back: orm.Mapped[str | None] = orm.mapped_column(sa.String, nullable=True)
     hint: orm.Mapped[str | None] = orm.mapped_column(sa.String, nullable=True)
     deck_id: orm.Mapped[int] = orm.mapped_column(sa.Integer, sa.ForeignKey("decks.id"))
+    # id of the transaction that last wrote the card, set by a row trigger (see the card_changes migration)
+    xact_id: orm.Mapped[int] = orm.mapped_column(sa.BigInteger, nullable=False, server_default="0")
+
+
+class CardTombstone(BigIntAuditBase):
+    """A card that left its deck, deleted or moved to another one by the transaction ``xact_id``."""
+
+    __tablename__ = "card_tombstones"
+    __table_args__ = (sa.Index("ix_card_tombstones_deck_id_xact_id_id", "deck_id", "xact_id", "id"),)
+
+    # written by statement-level triggers on cards (see the card_changes migration), never by the ORM
+    card_id: orm.Mapped[int] = orm.mapped_column(sa.Integer, nullable=False)
+    deck_id: orm.Mapped[int] = orm.mapped_column(sa.Integer, sa.ForeignKey("decks.id", ondelete="CASCADE"))
+    xact_id: orm.Mapped[int] = orm.mapped_column(sa.BigInteger, nullable=False)
@@ -0,0 +1,55 @@
+import base64
+import json
+import typing
+
+from litestar.exceptions import ValidationException
+from litestar.params import QueryParameter
+
+from app.settings import settings
+
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+
+
+INVALID_CURSOR_DETAIL: typing.Final = "Invalid cursor"
+
+PageLimit = typing.Annotated[int, QueryParameter(ge=1, le=settings.pagination_max_limit)]
+
+
+def encode_cursor(*key: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(",", ":")).encode()).decode()
+
+
+def decode_key(cursor: str, size: int, *prefix: int) -> tuple[int, ...]:
+    """Return the ``size`` key parts stored in ``cursor`` after ``prefix``, which must match."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError as exc:
+        raise ValidationException(INVALID_CURSOR_DETAIL) from exc
+    if (
+        not isinstance(key, list)
+        or len(key) != len(prefix) + size
+        or not all(type(part) is int for part in key)
+        or tuple(key[: len(prefix)]) != prefix
+    ):
+        raise ValidationException(INVALID_CURSOR_DETAIL)
+    return tuple(key[len(prefix) :])
+
+
+def decode_cursor(cursor: str | None, *prefix: int) -> int | None:
+    """Return the last seen id stored in ``cursor``; leading key parts must equal ``prefix``."""
+    if cursor is None:
+        return None
+    (after_id,) = decode_key(cursor, 1, *prefix)
+    return after_id
+
+
+def build_page[T](
+    objects: Sequence[T], limit: int, key: Callable[[T], tuple[int, ...]]
+) -> tuple[Sequence[T], str | None]:
+    """Trim the ``limit + 1`` probe row and return the page with the cursor to the next one."""
+    if len(objects) <= limit:
+        return objects, None
+    page = objects[:limit]
+    return page, encode_cursor(*key(page[-1]))
@@ -0,0 +1,97 @@
+import contextvars
+import dataclasses
+import logging
+import time
+import typing
+
+from litestar.datastructures import MutableScopeHeaders
+from litestar.enums import ScopeType
+from litestar.middleware import ASGIMiddleware
+from opentelemetry import trace
+from sqlalchemy import event
+
+from app.settings import settings
+
+
+if typing.TYPE_CHECKING:
+    from litestar.types import ASGIApp, Message, Receive, Scope, Send
+    from sqlalchemy.engine import Engine
+
+
+logger = logging.getLogger(__name__)
+
+# route handler opt overriding settings.query_budget, e.g. for endpoints that run one statement per batch
+QUERY_BUDGET_OPT: typing.Final = "query_budget"
+
+
+class QueryBudgetExceededError(RuntimeError):
+    pass
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class QueryStats:
+    request: str
+    budget: int
+    count: int = 0
+    duration: float = 0.0
+    started: float = 0.0
+
+    @property
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.3f};desc="{self.count} queries"'
+
+    @property
+    def over_budget(self) -> str:
+        return f"{self.request} ran {self.count} queries, over its budget of {self.budget}"
+
+
+_current: contextvars.ContextVar[QueryStats | None] = contextvars.ContextVar("query_stats", default=None)
+
+
+def _before_cursor_execute(*_: object) -> None:
+    if (stats := _current.get()) is not None:
+        stats.count += 1
+        # the statement over the budget fails, and the request with it before its response has started
+        if stats.count > stats.budget and settings.query_budget_raise:
+            raise QueryBudgetExceededError(stats.over_budget)
+        stats.started = time.perf_counter()
+
+
+def _after_cursor_execute(*_: object) -> None:
+    if (stats := _current.get()) is not None:
+        stats.duration += time.perf_counter() - stats.started
+
+
+def listen(engine: Engine) -> None:
+    """Count the statements of ``engine`` and their time into the stats of the current request."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryStatsMiddleware(ASGIMiddleware):
+    """Report the statements a request ran in ``Server-Timing`` and on its span, and enforce the query budget."""
+
+    scopes = (ScopeType.HTTP,)
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send, next_app: ASGIApp) -> None:
+        stats = QueryStats(
+            request=f"{scope['method']} {scope['path']}",
+            budget=scope["route_handler"].opt.get(QUERY_BUDGET_OPT, settings.query_budget),
+        )
+
+        async def send_with_server_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableScopeHeaders(message).add("server-timing", stats.server_timing)
+            await send(message)
+
+        token = _current.set(stats)
+        try:
+            await next_app(scope, receive, send_with_server_timing)
+        finally:
+            _current.reset(token)
+
+        span = trace.get_current_span()
+        span.set_attribute("db.query_count", stats.count)
+        span.set_attribute("db.query_duration_ms", stats.duration * 1000)
+        if stats.count > stats.budget and not settings.query_budget_raise:
+            logger.warning(stats.over_budget)
@@ -1,14 +1,121 @@
-from typing import TYPE_CHECKING
+import dataclasses
+import datetime
+import itertools
+import json
+from typing import TYPE_CHECKING, Any, Final
 
+import sqlalchemy as sa
+from advanced_alchemy.exceptions import NotFoundError, wrap_sqlalchemy_exception
 from advanced_alchemy.repository import SQLAlchemyAsyncRepository
 from advanced_alchemy.service import SQLAlchemyAsyncRepositoryService
 from sqlalchemy import orm
+from sqlalchemy.dialects import postgresql
 
-from app import models, schemas
+from app import changes, conditional, models, schemas
+from app.resources.db import create_session
+from app.resources.notifications import notify_deck_changed
+from app.settings import settings
 
 
 if TYPE_CHECKING:
-    from collections.abc import Sequence
+    from collections.abc import AsyncIterator, Iterable, Sequence
+    from contextlib import AbstractContextManager
+
+    from advanced_alchemy.base import BigIntAuditBase
+
+    from app.importing import Record
+
+
+NOT_FOUND_DETAIL = "No item found when one was expected"
+
+CARD_FIELDS: Final = tuple(schemas.Card.model_fields)
+DECK_FIELDS: Final = tuple(schemas.Deck.model_fields)
+
+# card columns an upsert compares with the stored row before writing it
+_UPSERT_COMPARED: Final = ("front", "back", "hint", "deck_id")
+
+# staging table for bulk imports, kept out of models.METADATA so migrations never see it
+CARDS_IMPORT: Final = sa.Table(
+    "cards_import",
+    sa.MetaData(),
+    sa.Column("seq", sa.BigInteger),
+    sa.Column("front", sa.String),
+    sa.Column("back", sa.String),
+    sa.Column("hint", sa.String),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+
+
+def _columns(entity: type[BigIntAuditBase], fields: Iterable[str], *keys: str) -> list[orm.InstrumentedAttribute[Any]]:
+    """Columns of ``entity`` backing the schema ``fields``, plus the ``keys`` the caller needs itself."""
+    return [getattr(entity, name) for name in dict.fromkeys((*keys, *fields))]
+
+
+def _select_deck_cards(deck_id: int, after_id: int | None, fields: Iterable[str] = CARD_FIELDS) -> sa.Select[Any]:
+    # deck_id and id form the cursor of the page
+    return (
+        sa.select(*_columns(models.Card, fields, "id", "deck_id"))
+        .where(models.Card.deck_id == deck_id, models.Card.id > (after_id or 0))
+        .order_by(models.Card.id)
+    )
+
+
+def _select_deck_version(deck_id: int) -> sa.Select[Any]:
+    """Select the deck version from the deck row alone, which the triggers keep current for its cards as well."""
+    return sa.select(models.Deck.xact_id, models.Deck.card_count).where(models.Deck.id == deck_id)
+
+
+def _select_deck_with_cards(deck_id: int, *columns: sa.ColumnElement[Any]) -> sa.Select[Any]:
+    """Select ``columns`` of the deck joined to its cards, followed by the deck version and latest change."""
+    return (
+        sa.select(
+            *columns,
+            models.Deck.xact_id,
+            models.Deck.card_count,
+            sa.func.greatest(
+                models.Deck.updated_at, sa.func.max(models.Card.updated_at), type_=models.Deck.updated_at.type
+            ),
+        )
+        .select_from(models.Deck)
+        .outerjoin(models.Card, models.Card.deck_id == models.Deck.id)
+        .where(models.Deck.id == deck_id)
+        .group_by(models.Deck.id)
+    )
+
+
+def _json_object(
+    model: type[schemas.Base], entity: type[BigIntAuditBase], **json_values: sa.ColumnElement[str]
+) -> sa.ColumnElement[str]:
+    """Render ``entity`` columns as a ``model`` JSON object, keeping pydantic's field order and compact separators.
+
+    ``json_build_object`` would pad separators with spaces, so the object is concatenated from ``to_json`` values.
+    """
+    parts: list[sa.ColumnElement[str]] = []
+    for name in model.model_fields:
+        value = json_values.get(name)
+        if value is None:
+            value = sa.func.coalesce(
+                sa.cast(sa.func.to_json(getattr(entity, name)), sa.Text), sa.literal("null", sa.Text)
+            )
+        parts += [sa.literal(("," if parts else "{") + json.dumps(name) + ":", sa.Text), value]
+    return sa.func.concat(*parts, sa.literal("}", sa.Text), type_=sa.Text)
+
+
+def _wrap_errors(repository: SQLAlchemyAsyncRepository[Any]) -> AbstractContextManager[None]:
+    """Turn driver errors of hand-written statements into repository errors, as the methods of ``repository`` do."""
+    return wrap_sqlalchemy_exception(
+        error_messages=repository.error_messages, dialect_name="postgresql", wrap_exceptions=repository.wrap_exceptions
+    )
+
+
+@dataclasses.dataclass(frozen=True, slots=True, kw_only=True)
+class UpsertResult:
+    """Upserted cards in request order, how many of them were written and the decks some were moved out of."""
+
+    cards: Sequence[models.Card]
+    changed: int
+    moved_from: set[int]
 
 
 class DecksRepository(SQLAlchemyAsyncRepositoryService[models.Deck]):
@@ -17,11 +124,99 @@ class DecksRepository(SQLAlchemyAsyncRepositoryService[models.Deck]):
 
     repository_type = BaseRepository
 
-    async def fetch_with_cards(self, deck_id: int) -> models.Deck:
-        return await self.get_one(
-            models.Deck.id == deck_id,
-            load=[orm.selectinload(models.Deck.cards)],
+    async def fetch_with_cards(
+        self, deck_id: int, fields: Iterable[str] | None = None, card_fields: Iterable[str] | None = None
+    ) -> models.Deck:
+        """Load the deck with its cards; ``fields`` and ``card_fields`` restrict the columns loaded for each.
+
+        The columns of the document version (``xact_id``, ``card_count`` and ``updated_at``) are always loaded.
+        """
+        cards = orm.selectinload(models.Deck.cards)
+        if card_fields is not None:
+            cards = cards.load_only(*_columns(models.Card, card_fields, "id", "deck_id", "updated_at"))
+        load = [cards]
+        if fields is not None:
+            deck_fields = [x for x in fields if x != "cards"]
+            load.append(orm.load_only(*_columns(models.Deck, deck_fields, "id", "xact_id", "card_count", "updated_at")))
+        return await self.get_one(models.Deck.id == deck_id, load=load)
+
+    async def fetch_many_with_cards(self, deck_ids: Sequence[int]) -> Sequence[models.Deck]:
+        """Load the decks among ``deck_ids`` with their cards, one ``IN`` query per table."""
+        return await self.list(models.Deck.id.in_(deck_ids), load=[orm.selectinload(models.Deck.cards)])
+
+    async def fetch_version(self, deck_id: int) -> conditional.Version:
+        row = (await self.repository.session.execute(_select_deck_version(deck_id))).one_or_none()
+        if row is None:
+            raise NotFoundError(NOT_FOUND_DETAIL)
+        return conditional.Version(xact_id=row.xact_id, count=row.card_count)
+
+    async def fetch_document(self, deck_id: int) -> tuple[bytes, conditional.Version]:
+        """Render the ``schemas.DeckWithCards`` JSON in Postgres with one query; bytes equal the pydantic output."""
+        card = _json_object(schemas.Card, models.Card)
+        cards = sa.func.string_agg(card, postgresql.aggregate_order_by(sa.literal_column("','"), models.Card.id))
+        cards_array = sa.func.concat(
+            sa.literal("[", sa.Text),
+            sa.func.coalesce(cards.filter(models.Card.id.is_not(None)), sa.literal("", sa.Text)),
+            sa.literal("]", sa.Text),
+        )
+        document = _json_object(schemas.DeckWithCards, models.Deck, cards=cards_array)
+        statement = _select_deck_with_cards(
+            deck_id, sa.func.convert_to(document, sa.literal_column("'UTF8'"), type_=sa.LargeBinary)
+        )
+        row = (await self.repository.session.execute(statement)).one_or_none()
+        if row is None:
+            raise NotFoundError(NOT_FOUND_DETAIL)
+        return row[0], conditional.Version(xact_id=row[1], count=row[2], updated_at=row[3])
+
+    async def create_with_cards(self, data: schemas.DeckWithCardsCreate) -> models.Deck:
+        """Insert the deck and its cards in one transaction, with a constant number of statements per deck.
+
+        The deck is inserted with ``INSERT ... RETURNING``, its cards with multi-row ``INSERT ... RETURNING``
+        statements of up to a thousand rows each.
+        """
+        session = self.repository.session
+        now = datetime.datetime.now(datetime.UTC)
+        with _wrap_errors(self.repository):
+            deck = (
+                await session.scalars(
+                    sa.insert(models.Deck)
+                    .values(**data.model_dump(exclude={"cards"}), created_at=now, updated_at=now)
+                    .returning(models.Deck)
+                )
+            ).one()
+            cards: list[models.Card] = []
+            if data.cards:
+                rows = [
+                    {**card.model_dump(), "deck_id": deck.id, "created_at": now, "updated_at": now}
+                    for card in data.cards
+                ]
+                cards = list(
+                    await session.scalars(
+                        sa.insert(models.Card).returning(models.Card, sort_by_parameter_order=True), rows
+                    )
+                )
+            if self.repository.auto_commit:
+                await session.commit()
+        # the triggers counted the cards of the new deck, set what they wrote instead of reloading the deck
+        orm.attributes.set_committed_value(deck, "cards", cards)
+        orm.attributes.set_committed_value(deck, "card_count", len(cards))
+        return deck
+
+    async def update_deck(self, deck_id: int, data: schemas.DeckCreate) -> models.Deck:
+        await notify_deck_changed(self.repository.session, deck_id)
+        return await self.update(data=data.model_dump(), item_id=deck_id)
+
+    async def list_page(
+        self, after_id: int | None, limit: int, fields: Iterable[str] = DECK_FIELDS
+    ) -> Sequence[sa.Row[Any]]:
+        """Select only the columns of the ``schemas.Deck`` fields as plain rows, skipping ORM hydration."""
+        statement = (
+            sa.select(*_columns(models.Deck, fields, "id"))
+            .where(models.Deck.id > (after_id or 0))
+            .order_by(models.Deck.id)
+            .limit(limit)
         )
+        return (await self.repository.session.execute(statement)).all()
 
 
 class CardsRepository(SQLAlchemyAsyncRepositoryService[models.Card]):
@@ -30,13 +225,191 @@ class CardsRepository(SQLAlchemyAsyncRepositoryService[models.Card]):
 
     repository_type = BaseRepository
 
-    async def list_for_deck(self, deck_id: int) -> Sequence[models.Card]:
-        return await self.get_many(models.Card.deck_id == deck_id)
+    async def fetch_version(self, card_id: int) -> conditional.Version:
+        statement = sa.select(models.Card.xact_id, models.Card.updated_at).where(models.Card.id == card_id)
+        row = (await self.repository.session.execute(statement)).one_or_none()
+        if row is None:
+            raise NotFoundError(NOT_FOUND_DETAIL)
+        return conditional.Version(xact_id=row.xact_id, count=1, updated_at=row.updated_at)
+
+    async def fetch_deck_version(self, deck_id: int) -> conditional.Version:
+        """Version of the cards of the deck, read from the deck row; a missing deck has no cards."""
+        row = (await self.repository.session.execute(_select_deck_version(deck_id))).one_or_none()
+        if row is None:
+            return conditional.Version(xact_id=0, count=0)
+        return conditional.Version(xact_id=row.xact_id, count=row.card_count)
+
+    async def fetch_card(self, card_id: int, fields: Iterable[str]) -> models.Card:
+        """Load the card with only the columns of ``fields``, its deck and its version."""
+        load = [orm.load_only(*_columns(models.Card, fields, "id", "deck_id", "xact_id", "updated_at"))]
+        return await self.get_one(models.Card.id == card_id, load=load)
+
+    async def list_for_deck(
+        self, deck_id: int, after_id: int | None, limit: int, fields: Iterable[str] = CARD_FIELDS
+    ) -> Sequence[sa.Row[Any]]:
+        """Select only the columns of the ``schemas.Card`` fields as plain rows, skipping ORM hydration."""
+        statement = _select_deck_cards(deck_id, after_id, fields).limit(limit)
+        return (await self.repository.session.execute(statement)).all()
+
+    async def stream_for_deck(
+        self, deck_id: int, after_id: int | None, chunk_size: int, fields: Iterable[str] = CARD_FIELDS
+    ) -> AsyncIterator[Sequence[sa.Row[Any]]]:
+        statement = _select_deck_cards(deck_id, after_id, fields).execution_options(yield_per=chunk_size)
+        # the body is sent after the request-scoped session is closed, so the server-side cursor
+        # runs on a session of its own; plain rows keep memory bounded by the chunk size
+        async with create_session(self.repository.session.bind) as session:  # ty: ignore[invalid-argument-type]
+            raw_connection = await (await session.connection()).get_raw_connection()
+            # reads run in autocommit, while a server-side cursor only lives inside a transaction
+            async with raw_connection.driver_connection.transaction():
+                result = await session.stream(statement)
+                async for rows in result.partitions():
+                    yield rows
+
+    async def list_changes(
+        self, deck_id: int, cursor: changes.ChangesCursor, limit: int
+    ) -> tuple[Sequence[sa.Row[Any]], Sequence[sa.Row[Any]]]:
+        """Cards of the deck changed after ``cursor`` and tombstones of cards that left it, in commit order.
+
+        Only changes of transactions older than the oldest one still running are returned: those are over, while
+        a running transaction may yet commit changes that order before ones already returned.
+        """
+        session = self.repository.session
+        horizon = sa.cast(sa.cast(sa.func.pg_snapshot_xmin(sa.func.pg_current_snapshot()), sa.Text), sa.BigInteger)
+        deck_exists, xmin = (
+            await session.execute(sa.select(sa.exists().where(models.Deck.id == deck_id), horizon))
+        ).one()
+        if not deck_exists:
+            raise NotFoundError(NOT_FOUND_DETAIL)
+        card, tombstone = models.Card, models.CardTombstone
+        cards = (
+            sa.select(*_columns(card, CARD_FIELDS, "xact_id"))
+            .where(
+                card.deck_id == deck_id,
+                sa.tuple_(card.xact_id, card.id) > (cursor.cards.xact_id, cursor.cards.id),
+                card.xact_id < xmin,
+            )
+            .order_by(card.xact_id, card.id)
+            .limit(limit)
+        )
+        tombstones = (
+            sa.select(tombstone.id, tombstone.card_id, tombstone.xact_id)
+            .where(
+                tombstone.deck_id == deck_id,
+                sa.tuple_(tombstone.xact_id, tombstone.id) > (cursor.tombstones.xact_id, cursor.tombstones.id),
+                tombstone.xact_id < xmin,
+                # a card that came back to the deck is newer than its tombstone and is sent as a change instead
+                ~sa.exists().where(card.id == tombstone.card_id, card.deck_id == deck_id),
+            )
+            .order_by(tombstone.xact_id, tombstone.id)
+            .limit(limit)
+        )
+        return (await session.execute(cards)).all(), (await session.execute(tombstones)).all()
 
     async def add_cards(self, deck_id: int, cards: list[schemas.CardCreate]) -> Sequence[models.Card]:
+        await notify_deck_changed(self.repository.session, deck_id)
         return await self.create_many([models.Card(**card.model_dump(), deck_id=deck_id) for card in cards])
 
-    async def upsert_cards(self, deck_id: int, cards: list[schemas.Card]) -> Sequence[models.Card]:
-        return await self.upsert_many(
-            [models.Card(**card.model_dump(exclude={"deck_id"}), deck_id=deck_id) for card in cards],
+    async def upsert_cards(self, deck_id: int, cards: list[schemas.Card]) -> UpsertResult:
+        """Insert or update ``cards`` by id with one ``INSERT ... ON CONFLICT`` statement per batch.
+
+        The existing cards of a batch are locked and read first, which finds the decks cards are moved out of
+        (those are notified too) and the cards equal to the stored ones, which the upsert leaves untouched.
+        """
+        session = self.repository.session
+        now = datetime.datetime.now(datetime.UTC)
+        # keyed by id: a repeated id keeps its last value, as ON CONFLICT cannot touch a row twice
+        rows = {
+            card.id: {**card.model_dump(exclude={"deck_id"}), "deck_id": deck_id, "created_at": now, "updated_at": now}
+            for card in cards
+        }
+        insert = postgresql.insert(models.Card)
+        statement = insert.on_conflict_do_update(
+            index_elements=[models.Card.id],
+            set_={
+                "front": insert.excluded.front,
+                "back": insert.excluded.back,
+                "hint": insert.excluded.hint,
+                "deck_id": insert.excluded.deck_id,
+                "updated_at": insert.excluded.updated_at,
+            },
+            # skip rows that would not change: no new row version, WAL or index churn, and no updated_at bump
+            where=sa.tuple_(*_columns(models.Card, _UPSERT_COMPARED)).is_distinct_from(
+                sa.tuple_(*(insert.excluded[x] for x in _UPSERT_COMPARED))
+            ),
+        )
+        options = {"populate_existing": True}
+        upserted: dict[int, models.Card] = {}
+        changed = 0
+        moved_from: set[int] = set()
+        with _wrap_errors(self.repository):
+            for batch in itertools.batched(rows.values(), settings.upsert_batch_size, strict=False):
+                # locked, so the decks read here are still the ones the upsert moves the cards out of
+                existing = await session.scalars(
+                    sa.select(models.Card).where(models.Card.id.in_([x["id"] for x in batch])).with_for_update(),
+                    execution_options=options,
+                )
+                for card in existing:
+                    upserted[card.id] = card
+                    if card.deck_id != deck_id:
+                        moved_from.add(card.deck_id)
+                # RETURNING leaves out the rows the WHERE clause skipped, those keep the state read above
+                result = await session.scalars(
+                    statement.values(list(batch)).returning(models.Card), execution_options=options
+                )
+                written = {card.id: card for card in result}
+                changed += len(written)
+                upserted.update(written)
+            await notify_deck_changed(session, deck_id, *moved_from)
+            if self.repository.auto_commit:
+                await session.commit()
+        # RETURNING order is not guaranteed, keep the order of the request
+        return UpsertResult(cards=[upserted[card_id] for card_id in rows], changed=changed, moved_from=moved_from)
+
+    async def import_cards(self, deck_id: int, records: AsyncIterator[Record]) -> int:
+        """COPY ``records`` into a staging table and merge them into the deck; return how many cards were new."""
+        session = self.repository.session
+        if not await session.scalar(sa.select(sa.exists().where(models.Deck.id == deck_id))):
+            raise NotFoundError(NOT_FOUND_DETAIL)
+        await notify_deck_changed(session, deck_id)
+        connection = await session.connection()
+        await connection.run_sync(CARDS_IMPORT.create)
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            CARDS_IMPORT.name, records=records, columns=[x.name for x in CARDS_IMPORT.columns]
+        )
+
+        now = sa.literal(datetime.datetime.now(datetime.UTC), models.Card.updated_at.type)
+        # the last row wins when a front repeats, as ON CONFLICT cannot touch a row twice
+        latest = (
+            sa.select(
+                CARDS_IMPORT.c.front,
+                CARDS_IMPORT.c.back,
+                CARDS_IMPORT.c.hint,
+                sa.literal(deck_id, sa.Integer),
+                now,
+                now,
+            )
+            .distinct(CARDS_IMPORT.c.front)
+            .order_by(CARDS_IMPORT.c.front, CARDS_IMPORT.c.seq.desc())
+        )
+        insert = postgresql.insert(models.Card).from_select(
+            ["front", "back", "hint", "deck_id", "created_at", "updated_at"], latest
+        )
+        merged = (
+            insert.on_conflict_do_update(
+                constraint="card_deck_id_front_uc",
+                set_={
+                    "back": insert.excluded.back,
+                    "hint": insert.excluded.hint,
+                    "updated_at": insert.excluded.updated_at,
+                },
+            )
+            # xmax is zero only for rows this statement inserted
+            .returning(sa.literal_column("xmax = 0", sa.Boolean).label("inserted"))
+            .cte("merged")
         )
+        inserted = await session.scalar(sa.select(sa.func.count()).select_from(merged).where(merged.c.inserted))
+        await connection.run_sync(CARDS_IMPORT.drop)
+        if self.repository.auto_commit:
+            await session.commit()
+        return inserted or 0
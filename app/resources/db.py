@@ -2,23 +2,81 @@ import asyncio
 import logging
 import typing
 
+from sqlalchemy import event, exc, orm
 from sqlalchemy.ext import asyncio as sa
 
-from app.settings import settings
+from app import query_stats
+from app.resources.pool_metrics import InstrumentedPool, PoolMetrics
+from app.settings import PoolLiveness, settings
+
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Sequence
+
+    from sqlalchemy.engine import Result
+    from sqlalchemy.engine.url import URL
 
 
 logger = logging.getLogger(__name__)
 
+READ_ONLY_DETAIL: typing.Final = "Read-only session cannot flush changes"
+
+
+class ReadOnlySession(orm.Session):
+    """Session of safe-method requests: it runs in autocommit mode and never writes."""
+
+    def flush(self, objects: Sequence[object] | None = None) -> None:
+        if self.new or self.dirty or self.deleted:
+            raise exc.InvalidRequestError(READ_ONLY_DETAIL)
+        super().flush(objects)
+
+
+def _retry_read_after_disconnect(state: orm.ORMExecuteState) -> Result[typing.Any]:
+    # every statement of execute, scalar, scalars, get and stream passes here; reads are idempotent and run in
+    # autocommit, so a statement that met a dropped connection is safely run again on a fresh one
+    try:
+        return state.invoke_statement()
+    except exc.DBAPIError as error:
+        if not error.connection_invalidated:
+            raise
+        logger.warning("Retrying a read on a fresh connection after a disconnect")
+        state.session.rollback()
+        return state.invoke_statement()
+
+
+event.listen(ReadOnlySession, "do_orm_execute", _retry_read_after_disconnect)
+
+
+def create_sa_engine(liveness: PoolLiveness | None = None) -> sa.AsyncEngine:
+    return create_engine_for(settings.db_dsn_parsed, liveness=liveness)
 
-def create_sa_engine() -> sa.AsyncEngine:
-    return sa.create_async_engine(
-        url=settings.db_dsn_parsed,
+
+def create_engine_for(
+    url: URL,
+    async_creator: Callable[[], Awaitable[typing.Any]] | None = None,
+    pool_name: str = "primary",
+    liveness: PoolLiveness | None = None,
+) -> sa.AsyncEngine:
+    """Create an instrumented engine; ``liveness`` overrides ``settings.db_pool_liveness``."""
+    engine = sa.create_async_engine(
+        url=url,
         echo=settings.service_debug,
         echo_pool=settings.service_debug,
+        poolclass=InstrumentedPool,
+        pool_logging_name=pool_name,
         pool_size=settings.db_pool_size,
-        pool_pre_ping=settings.db_pool_pre_ping,
+        pool_pre_ping=(liveness or settings.db_pool_liveness) == "pre_ping",
         max_overflow=settings.db_max_overflow,
+        async_creator=async_creator,
     )
+    PoolMetrics(pool_name).listen(engine.sync_engine)
+    query_stats.listen(engine.sync_engine)
+    return engine
+
+
+def create_read_engine(engine: sa.AsyncEngine) -> sa.AsyncEngine:
+    # shares the pool of ``engine``; autocommit saves the BEGIN and ROLLBACK round trips around reads
+    return engine.execution_options(isolation_level="AUTOCOMMIT")
 
 
 async def close_sa_engine(engine: sa.AsyncEngine) -> None:
@@ -37,6 +95,16 @@ def create_session(engine: sa.AsyncEngine) -> sa.AsyncSession:
     )
 
 
+def create_read_only_session(engine: sa.AsyncEngine | sa.AsyncConnection) -> sa.AsyncSession:
+    return sa.AsyncSession(
+        engine,
+        expire_on_commit=False,
+        autoflush=False,
+        join_transaction_mode="create_savepoint",
+        sync_session_class=ReadOnlySession,
+    )
+
+
 async def close_session(session: sa.AsyncSession) -> None:
     task: typing.Final = asyncio.create_task(session.close())
     await asyncio.shield(task)
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import typing
+
+import asyncpg
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncEngine  # noqa: TC002
+
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+DECK_CHANGES_CHANNEL: typing.Final = "deck_changes"
+RECONNECT_INITIAL_DELAY: typing.Final = 0.5
+RECONNECT_MAX_DELAY: typing.Final = 30.0
+
+logger = logging.getLogger(__name__)
+
+
+async def notify_deck_changed(session: AsyncSession, *deck_ids: int) -> None:
+    # NOTIFY is transactional: it is delivered on commit and dropped on rollback; one statement for all decks
+    deck_id = sa.func.unnest(sa.literal(list(deck_ids), postgresql.ARRAY(sa.Integer))).column_valued("deck_id")
+    await session.execute(sa.select(sa.func.pg_notify(DECK_CHANGES_CHANNEL, sa.cast(deck_id, sa.Text))))
+
+
+class DeckChangesListener:
+    """Fans ``deck_changes`` notifications from every worker out to in-process subscribers.
+
+    A lost connection is re-established with exponential backoff. Notifications sent while it was down are gone, so
+    the reconnect callbacks run once it listens again, to drop whatever they may have left stale.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        reconnect_initial_delay: float = RECONNECT_INITIAL_DELAY,
+        reconnect_max_delay: float = RECONNECT_MAX_DELAY,
+    ) -> None:
+        # a dedicated connection outside of the pool, so listening never takes a slot from requests
+        self._dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        self._reconnect_initial_delay = reconnect_initial_delay
+        self._reconnect_max_delay = reconnect_max_delay
+        self._subscribers: list[Callable[[int], None]] = []
+        self._reconnect_callbacks: list[Callable[[], None]] = []
+        self._connection: asyncpg.Connection | None = None
+        self._reconnect_task: asyncio.Task[None] | None = None
+
+    def subscribe(self, callback: Callable[[int], None], on_reconnect: Callable[[], None] | None = None) -> None:
+        self._subscribers.append(callback)
+        if on_reconnect is not None:
+            self._reconnect_callbacks.append(on_reconnect)
+
+    async def start(self) -> None:
+        self._connection = await self._listen()
+
+    async def stop(self) -> None:
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            await asyncio.gather(self._reconnect_task, return_exceptions=True)
+            self._reconnect_task = None
+        if self._connection is not None:
+            # closing on purpose is not a connection loss
+            self._connection.remove_termination_listener(self._on_termination)
+            await self._connection.close()
+            self._connection = None
+
+    async def _listen(self) -> asyncpg.Connection:
+        connection = await asyncpg.connect(self._dsn)
+        await connection.add_listener(DECK_CHANGES_CHANNEL, self._dispatch)
+        connection.add_termination_listener(self._on_termination)
+        return connection
+
+    def _on_termination(self, _: object) -> None:
+        logger.warning("Lost the %s listener connection, reconnecting", DECK_CHANGES_CHANNEL)
+        self._connection = None
+        self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        delay = self._reconnect_initial_delay
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                connection = await self._listen()
+            except (OSError, asyncpg.PostgresError, TimeoutError) as exc:
+                delay = min(delay * 2, self._reconnect_max_delay)
+                logger.warning(
+                    "Reconnecting the %s listener failed, retrying in %ss", DECK_CHANGES_CHANNEL, delay, exc_info=exc
+                )
+                continue
+            break
+        self._connection = connection
+        self._reconnect_task = None
+        for callback in self._reconnect_callbacks:
+            callback()
+
+    def _dispatch(self, _: object, __: int, ___: str, payload: str) -> None:
+        deck_id = int(payload)
+        for callback in self._subscribers:
+            callback(deck_id)
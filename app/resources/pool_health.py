@@ -0,0 +1,82 @@
+import asyncio
+import contextlib
+import logging
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine  # noqa: TC002
+
+from app.resources.replicas import ReplicaRouter  # noqa: TC001
+from app.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class PoolHealthChecker:
+    """Ping the idle connections of ``engines`` every ``interval`` seconds and replace the ones that fail.
+
+    Used instead of ``pool_pre_ping``, which spends a round trip on every checkout.
+    """
+
+    def __init__(self, engines: list[AsyncEngine], interval: float, timeout: float) -> None:
+        self.engines = engines
+        self.interval = interval
+        self.timeout = timeout
+        self._task: asyncio.Task[None] | None = None
+
+    async def check(self, engine: AsyncEngine) -> int:
+        """Ping the idle connections of ``engine`` one at a time; return how many were replaced."""
+        replaced = 0
+        # the queue is FIFO: each checkout takes the longest idle connection and the ping returns it to the back
+        rounds = engine.pool.checkedin()  # ty: ignore[unresolved-attribute]
+        # requests may have taken the rest by now, and checking out of an empty queue would wait for them or open
+        # an overflow connection; nothing else runs between this test and the checkout in _ping
+        while rounds and engine.pool.checkedin():  # ty: ignore[unresolved-attribute]
+            rounds -= 1
+            replaced += not await self._ping(engine.connect())
+        if replaced:
+            logger.warning("Replaced %s dead connections of the %s pool", replaced, engine.pool.logging_name)
+        return replaced
+
+    async def _ping(self, connection: AsyncConnection) -> bool:
+        try:
+            await connection.start()
+            async with asyncio.timeout(self.timeout):
+                await connection.exec_driver_sql("SELECT 1")
+        except OSError, exc.DBAPIError, TimeoutError:
+            if connection.sync_connection is not None:
+                # a disconnect already invalidated it, a timeout leaves it in an unknown state
+                await connection.invalidate()
+            return False
+        finally:
+            if connection.sync_connection is not None:
+                await connection.close()
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            for engine in self.engines:
+                try:
+                    await self.check(engine)
+                except Exception:
+                    # a failed round must not end the checker, the next one may succeed
+                    logger.exception("Checking the %s pool failed", engine.pool.logging_name)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+
+def create_pool_health_checker(engine: AsyncEngine, replicas: ReplicaRouter) -> PoolHealthChecker:
+    return PoolHealthChecker(
+        [engine, *replicas.engines],
+        interval=settings.db_pool_health_check_interval,
+        timeout=settings.db_pool_health_check_timeout,
+    )
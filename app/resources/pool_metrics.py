@@ -0,0 +1,149 @@
+import os
+import pathlib
+import tempfile
+import time
+import typing
+
+import prometheus_client
+from opentelemetry import metrics
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.settings import settings
+
+
+if typing.TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+    from sqlalchemy.pool import ConnectionPoolEntry, PoolProxiedConnection
+
+
+_METER: typing.Final = metrics.get_meter(__name__)
+_POOL_LABEL: typing.Final = ("pool",)
+# read by prometheus_client on import; when set, every worker writes its samples to files in this directory and
+# /metrics aggregates the files of all workers instead of reporting the one worker that serves the scrape
+MULTIPROC_DIR_ENV: typing.Final = "PROMETHEUS_MULTIPROC_DIR"
+
+CHECKOUT_WAIT: typing.Final = prometheus_client.Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection", _POOL_LABEL
+)
+# gauges are summed over the live workers, counters and histograms over all of them
+IN_USE: typing.Final = prometheus_client.Gauge(
+    "db_pool_connections_in_use", "Checked out connections", _POOL_LABEL, multiprocess_mode="livesum"
+)
+OVERFLOW: typing.Final = prometheus_client.Gauge(
+    "db_pool_overflow", "Open connections beyond the pool size", _POOL_LABEL, multiprocess_mode="livesum"
+)
+LIFETIME: typing.Final = prometheus_client.Histogram(
+    "db_pool_connection_lifetime_seconds",
+    "Time from opening to closing a connection",
+    _POOL_LABEL,
+    buckets=(1, 10, 60, 300, 900, 1800, 3600, 4 * 3600, float("inf")),
+)
+INVALIDATIONS: typing.Final = prometheus_client.Counter(
+    "db_pool_invalidations", "Connections invalidated after an error", _POOL_LABEL
+)
+
+_CHECKOUT_WAIT: typing.Final = _METER.create_histogram(
+    "db.pool.checkout.wait", unit="s", description="Time spent waiting for a pooled connection"
+)
+_IN_USE: typing.Final = _METER.create_up_down_counter(
+    "db.pool.connections.in_use", description="Checked out connections"
+)
+_OVERFLOW: typing.Final = _METER.create_gauge("db.pool.overflow", description="Open connections beyond the pool size")
+_LIFETIME: typing.Final = _METER.create_histogram(
+    "db.pool.connection.lifetime", unit="s", description="Time from opening to closing a connection"
+)
+_INVALIDATIONS: typing.Final = _METER.create_counter(
+    "db.pool.invalidations", description="Connections invalidated after an error"
+)
+
+_CONNECTED_AT: typing.Final = "connected_at"
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waits, labelled by the pool's ``logging_name``."""
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            wait = time.perf_counter() - started
+            name = self.logging_name or ""
+            CHECKOUT_WAIT.labels(name).observe(wait)
+            _CHECKOUT_WAIT.record(wait, {"pool": name})
+
+
+class PoolMetrics:
+    """Track in-use and overflow connections and connection lifetimes from the pool events of one engine."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.open = 0
+        self._attributes = {"pool": name}
+
+    def listen(self, engine: Engine) -> None:
+        # pool listeners are carried over when dispose() recreates the pool
+        event.listen(engine, "connect", self.on_connect)
+        event.listen(engine, "close", self.on_close)
+        event.listen(engine, "checkout", self.on_checkout)
+        event.listen(engine, "checkin", self.on_checkin)
+        event.listen(engine, "invalidate", self.on_invalidate)
+
+    def _set_open(self, delta: int) -> None:
+        self.open += delta
+        overflow = max(self.open - settings.db_pool_size, 0)
+        OVERFLOW.labels(self.name).set(overflow)
+        _OVERFLOW.set(overflow, self._attributes)
+
+    def on_connect(self, _: object, record: ConnectionPoolEntry) -> None:
+        record.info[_CONNECTED_AT] = time.monotonic()
+        self._set_open(1)
+
+    def on_close(self, _: object, record: ConnectionPoolEntry) -> None:
+        self._set_open(-1)
+        if (connected_at := record.info.pop(_CONNECTED_AT, None)) is not None:
+            lifetime = time.monotonic() - connected_at
+            LIFETIME.labels(self.name).observe(lifetime)
+            _LIFETIME.record(lifetime, self._attributes)
+
+    def on_checkout(self, _: object, __: ConnectionPoolEntry, ___: PoolProxiedConnection) -> None:
+        IN_USE.labels(self.name).inc()
+        _IN_USE.add(1, self._attributes)
+
+    def on_checkin(self, _: object, __: ConnectionPoolEntry) -> None:
+        IN_USE.labels(self.name).dec()
+        _IN_USE.add(-1, self._attributes)
+
+    def on_invalidate(self, _: object, __: ConnectionPoolEntry, ___: BaseException | None) -> None:
+        INVALIDATIONS.labels(self.name).inc()
+        _INVALIDATIONS.add(1, self._attributes)
+
+
+def setup_meter_provider(endpoint: str) -> None:
+    """Export metrics over OTLP next to the traces; without an endpoint they are only served to Prometheus."""
+    if endpoint:
+        # the SDK and the gRPC exporter are slow to import, so they are only loaded when configured
+        from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter  # noqa: PLC0415
+        from opentelemetry.sdk.metrics import MeterProvider  # noqa: PLC0415
+        from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader  # noqa: PLC0415
+
+        reader = PeriodicExportingMetricReader(OTLPMetricExporter(endpoint=endpoint, insecure=True))
+        metrics.set_meter_provider(MeterProvider(metric_readers=[reader]))
+
+
+def setup_multiprocess_metrics() -> None:
+    """Share the Prometheus metrics of the workers; run in the server process, before the workers start."""
+    directory = pathlib.Path(os.environ.get(MULTIPROC_DIR_ENV) or tempfile.mkdtemp(prefix="prometheus-"))
+    directory.mkdir(parents=True, exist_ok=True)
+    # samples of an earlier run would be added to this one's; the directory and anything else in it are left alone
+    for path in directory.glob("*.db"):
+        path.unlink(missing_ok=True)
+    os.environ[MULTIPROC_DIR_ENV] = str(directory)
+
+
+def mark_worker_dead() -> None:
+    # drop the gauges of a worker that exits, recycled workers would keep counting otherwise
+    if MULTIPROC_DIR_ENV in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
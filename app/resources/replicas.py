@@ -0,0 +1,71 @@
+import functools
+import time
+import typing
+
+import asyncpg
+import litestar  # noqa: TC002
+from sqlalchemy.engine.url import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession  # noqa: TC002
+
+from app.resources.db import create_engine_for, create_read_engine, create_read_only_session
+from app.settings import settings
+
+
+STICKY_PRIMARY_COOKIE: typing.Final = "db_primary"
+SAFE_METHODS: typing.Final = frozenset(("GET", "HEAD", "OPTIONS"))
+
+
+class ReplicaRouter:
+    """Round-robin over replica engines; a replica that fails to connect is skipped for ``retry_after`` seconds."""
+
+    def __init__(self, urls: list[URL], retry_after: float) -> None:
+        self.retry_after = retry_after
+        self.engines = [
+            create_read_engine(
+                create_engine_for(
+                    url, async_creator=functools.partial(self._connect, index, url), pool_name=f"replica-{index}"
+                )
+            )
+            for index, url in enumerate(urls)
+        ]
+        self._unhealthy_until = [0.0] * len(urls)
+        self._next = 0
+
+    def pick(self) -> AsyncEngine | None:
+        now = time.monotonic()
+        for _ in self.engines:
+            index = self._next
+            self._next = (self._next + 1) % len(self.engines)
+            if self._unhealthy_until[index] <= now:
+                return self.engines[index]
+        return None
+
+    async def _connect(self, index: int, url: URL) -> asyncpg.Connection:
+        try:
+            return await asyncpg.connect(url.set(drivername="postgresql").render_as_string(hide_password=False))
+        except OSError, asyncpg.PostgresError:
+            self._unhealthy_until[index] = time.monotonic() + self.retry_after
+            raise
+
+    async def dispose(self) -> None:
+        for engine in self.engines:
+            await engine.dispose()
+
+
+def create_replica_router() -> ReplicaRouter:
+    return ReplicaRouter(
+        [make_url(dsn) for dsn in settings.db_replica_dsns], retry_after=settings.db_replica_retry_after
+    )
+
+
+async def close_replica_router(router: ReplicaRouter) -> None:
+    await router.dispose()
+
+
+def create_read_session(
+    engine: AsyncEngine, replicas: ReplicaRouter, request: litestar.Request[typing.Any, typing.Any, typing.Any]
+) -> AsyncSession:
+    """Bind reads to a replica, or to the primary while the client is sticky or no replica is healthy."""
+    if STICKY_PRIMARY_COOKIE not in request.cookies and (replica := replicas.pick()) is not None:
+        engine = replica
+    return create_read_only_session(engine)
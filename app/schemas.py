@@ -16,8 +16,8 @@ class Collection[T: Base](Base):
     items: list[T]
 
     @classmethod
-    def from_models(cls, objects: Iterable[object]) -> Self:
-        return cls.model_validate({"items": list(objects)})
+    def from_models(cls, objects: Iterable[object], **fields: object) -> Self:
+        return cls.model_validate({"items": list(objects), **fields})
 
 
 class CardBase(Base):
@@ -36,7 +36,26 @@ class Card(CardBase):
 
 
 class Cards(Collection[Card]):
-    pass
+    next_cursor: str | None = None
+
+
+class CardsWritten(Collection[Card]):
+    """Cards a write created or updated, in request order; unlike the list of a deck it has no pages."""
+
+
+class CardsUpsert(CardsWritten):
+    """Outcome of an upsert; ``unchanged`` cards matched the stored ones and were not written."""
+
+    changed: int
+    unchanged: int
+
+
+class CardsImport(Base):
+    """Outcome of a bulk import; a row repeating the front of an earlier row counts as an update."""
+
+    inserted: int
+    updated: int
+    rejected: int
 
 
 class DeckBase(Base):
@@ -48,10 +67,15 @@ class DeckCreate(DeckBase):
     pass
 
 
+class DeckWithCardsCreate(DeckCreate):
+    cards: list[CardCreate]
+
+
 class Deck(DeckBase):
     """Light deck view for lists and writes; cards are not loaded."""
 
     id: PositiveInt
+    card_count: int
 
 
 class DeckWithCards(Deck):
@@ -61,4 +85,20 @@ class DeckWithCards(Deck):
 
 
 class Decks(Collection[Deck]):
-    pass
+    next_cursor: str | None = None
+
+
+class DecksBatch(Base):
+    """Decks by requested id; an id without a deck maps to ``null``."""
+
+    items: dict[int, DeckWithCards | None]
+
+
+class DeckChanges(Base):
+    """Cards of a deck created or updated since a cursor, and ids of cards deleted or moved out since."""
+
+    cards: list[Card]
+    deleted: list[PositiveInt]
+    next_cursor: str
+    # more changes are waiting: fetch again with next_cursor right away instead of at the next sync
+    has_more: bool
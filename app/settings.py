@@ -1,8 +1,15 @@
+import typing
+import warnings
+
+import pydantic
 import pydantic_settings
 from lite_bootstrap import LitestarConfig
 from sqlalchemy.engine.url import URL, make_url
 
 
+type PoolLiveness = typing.Literal["pre_ping", "background"]
+
+
 class Settings(pydantic_settings.BaseSettings):
     service_name: str = "Litestar template"
     service_version: str = "1.0.0"
@@ -13,10 +20,31 @@ class Settings(pydantic_settings.BaseSettings):
     db_dsn: str = "postgresql+asyncpg://postgres:password@db/postgres"
     db_pool_size: int = 5
     db_max_overflow: int = 0
-    db_pool_pre_ping: bool = True
+    # "pre_ping" tests every connection with a round trip on checkout; "background" pings the idle ones every
+    # db_pool_health_check_interval seconds instead, and reads that still hit a dropped connection are retried
+    db_pool_liveness: PoolLiveness = "pre_ping"
+    # deprecated alias of db_pool_liveness, so DB_POOL_PRE_PING=false keeps selecting the background checker
+    db_pool_pre_ping: bool | None = None
+    db_pool_health_check_interval: float = 30.0
+    db_pool_health_check_timeout: float = 5.0
+    # open the pool and prepare the hot queries on startup, so the first requests after a deploy skip both
+    db_pool_warm_up: bool = True
+    db_replica_dsns: list[str] = []
+    db_replica_retry_after: float = 30.0
+    db_sticky_primary_seconds: int = 5
+    # connections the primary accepts from this service: its max_connections minus reserved and other clients
+    db_connection_budget: int = 97
 
     app_host: str = "0.0.0.0"  # noqa: S104
     app_port: int = 8000
+    app_workers: int = 1
+    app_runtime_threads: int = 1
+    app_backpressure: int | None = None  # requests in flight per worker, granian defaults to backlog / workers
+    app_http: typing.Literal["auto", "1", "2"] = "auto"
+    app_http1_keep_alive: bool = True
+    app_respawn_failed_workers: bool = True
+    app_workers_lifetime: int | None = None  # seconds before a worker is gracefully recycled, at least 60
+    app_workers_max_rss: int | None = None  # MiB of resident memory before a worker is recycled
 
     opentelemetry_endpoint: str = ""
     sentry_dsn: str = ""
@@ -29,11 +57,70 @@ class Settings(pydantic_settings.BaseSettings):
     cors_exposed_headers: list[str] = []
 
     request_max_body_size: int = 1024 * 1024  # 1MB limit
+    import_max_body_size: int = 1024 * 1024 * 1024  # 1GB limit
+
+    pagination_default_limit: int = 100
+    pagination_max_limit: int = 1000
+    stream_chunk_size: int = 1000
+    deck_batch_max_size: int = 50
+    upsert_batch_size: int = 1000
+    # render the get_deck document with one Postgres query instead of loading and encoding ORM objects
+    deck_json_from_database: bool = False
+
+    # DB-bound requests admitted at once per gate. Zero sizes the gates from the pool capacity (pool size plus
+    # overflow): without replicas the primary pool is split between them, with replicas the read gate gets the
+    # capacity of all replica pools and the write gate that of the primary
+    admission_read_limit: int = 0
+    admission_write_limit: int = 0
+    admission_queue_size: int = 100
+    admission_queue_timeout: float = 1.0
+    admission_retry_after: int = 1
+
+    # statements a request may run before it is logged as a likely N+1; with query_budget_raise the statement
+    # over the budget raises instead, failing the request with a 500 (streamed bodies may have started already)
+    query_budget: int = 10
+    query_budget_raise: bool = False
+
+    cache_max_size: int = 1024
+    cache_ttl: float = 60.0
 
     @property
     def db_dsn_parsed(self) -> URL:
         return make_url(self.db_dsn)
 
+    @property
+    def db_connections_per_worker(self) -> int:
+        # the pool at full overflow plus the dedicated LISTEN connection of DeckChangesListener
+        return self.db_pool_size + self.db_max_overflow + 1
+
+    @property
+    def db_connections_total(self) -> int:
+        return self.app_workers * self.db_connections_per_worker
+
+    @pydantic.model_validator(mode="after")
+    def check_db_connection_budget(self) -> typing.Self:
+        if self.db_connections_total > self.db_connection_budget:
+            msg = (
+                f"{self.app_workers} workers open up to {self.db_connections_total} connections to the primary, "
+                f"over db_connection_budget={self.db_connection_budget}: lower app_workers or db_pool_size"
+            )
+            raise ValueError(msg)
+        return self
+
+    @pydantic.model_validator(mode="after")
+    def map_db_pool_pre_ping(self) -> typing.Self:
+        if self.db_pool_pre_ping is None:
+            return self
+        liveness: PoolLiveness = "pre_ping" if self.db_pool_pre_ping else "background"
+        if "db_pool_liveness" in self.model_fields_set and self.db_pool_liveness != liveness:
+            msg = f"db_pool_pre_ping={self.db_pool_pre_ping} contradicts db_pool_liveness={self.db_pool_liveness}"
+            raise ValueError(msg)
+        warnings.warn(
+            f"db_pool_pre_ping is deprecated, set db_pool_liveness={liveness} instead", FutureWarning, stacklevel=2
+        )
+        self.db_pool_liveness = liveness
+        return self
+
     @property
     def api_bootstrapper_config(self) -> LitestarConfig:
         return LitestarConfig(
@@ -0,0 +1,41 @@
+import typing
+
+from litestar.response import Stream
+
+from app import encoding
+
+
+if typing.TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Mapping, Sequence
+
+    import litestar
+    import pydantic
+
+
+NDJSON_MEDIA_TYPE: typing.Final = "application/x-ndjson"
+
+
+async def encode_ndjson(
+    model: type[pydantic.BaseModel], partitions: AsyncIterator[Sequence[object]]
+) -> AsyncIterator[bytes]:
+    async for rows in partitions:
+        yield b"".join(line + b"\n" for line in encoding.encode_many(model, rows))
+
+
+async def encode_collection(
+    model: type[pydantic.BaseModel], partitions: AsyncIterator[Sequence[object]]
+) -> AsyncIterator[bytes]:
+    """Stream the ``schemas.Collection`` document shape one chunk at a time."""
+    yield b'{"items":['
+    separator = b""
+    async for rows in partitions:
+        yield separator + b",".join(encoding.encode_many(model, rows))
+        separator = b","
+    yield b'],"next_cursor":null}'
+
+
+def stream_response(
+    content: AsyncIterator[bytes], media_type: str, headers: Mapping[str, str] | None = None
+) -> litestar.Response[typing.Any]:
+    """Stream ``content`` chunk by chunk; handlers declare the schema it follows as their return type."""
+    return Stream(content, media_type=media_type, headers=headers)
@@ -0,0 +1,57 @@
+import asyncio
+import contextlib
+import functools
+import logging
+import typing
+
+from advanced_alchemy.exceptions import NotFoundError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine  # noqa: TC002
+
+from app import models
+from app.repositories import CardsRepository, DecksRepository
+from app.resources.db import create_read_only_session
+from app.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+# ids start at 1, so the primed lookups find nothing and read no rows
+_MISSING_ID: typing.Final = 0
+
+
+async def prime_statement_cache(connection: AsyncConnection) -> None:
+    """Run the hot queries of the read endpoints once, so asyncpg has them prepared on ``connection``."""
+    async with create_read_only_session(connection) as session:
+        decks = DecksRepository(session=session, auto_commit=False)
+        cards = CardsRepository(session=session, auto_commit=False)
+        limit = settings.pagination_default_limit + 1
+        await decks.list_page(None, limit)
+        await cards.list_for_deck(_MISSING_ID, None, limit)
+        await cards.fetch_deck_version(_MISSING_ID)
+        lookups = (
+            functools.partial(decks.fetch_version, _MISSING_ID),
+            functools.partial(
+                decks.fetch_document if settings.deck_json_from_database else decks.fetch_with_cards, _MISSING_ID
+            ),
+            functools.partial(cards.fetch_version, _MISSING_ID),
+            functools.partial(cards.get_one, models.Card.id == _MISSING_ID),
+        )
+        for lookup in lookups:
+            with contextlib.suppress(NotFoundError):
+                await lookup()
+
+
+async def _open(connection: AsyncConnection) -> None:
+    await connection.start()
+    await prime_statement_cache(connection)
+
+
+async def warm_up_pool(engine: AsyncEngine) -> None:
+    """Open ``db_pool_size`` connections of ``engine`` at once and prime each; on failure they open on demand."""
+    connections = [engine.connect() for _ in range(settings.db_pool_size)]
+    results = await asyncio.gather(*(_open(x) for x in connections), return_exceptions=True)
+    for connection in connections:
+        if connection.sync_connection is not None:
+            await connection.close()
+    if errors := [x for x in results if isinstance(x, BaseException)]:
+        logger.warning("Warming up the %s pool failed", engine.pool.logging_name, exc_info=errors[0])
@@ -0,0 +1,306 @@
+"""Measure latency, throughput and DB queries of every API route.
+
+Run against a migrated database: ``python -m benchmarks.endpoints``. The app is built with
+``app.application.build_app`` and driven in-process over ASGI (``--transport asgi``) or through a
+granian server on a real socket (``--transport granian``). Results go to stdout, or to ``--output``,
+as JSON. With ``--baseline``, routes whose p95 latency, RPS or queries per request regressed by more
+than ``--tolerance`` are reported and the exit status is 1.
+
+The granian transport runs ``python -m app``, so the ``APP_*`` server settings of the environment
+(runtime threads, backpressure, HTTP mode) apply, with ``--workers`` overriding ``APP_WORKERS``. To see
+what extra worker processes buy, run the same load with ``--workers 1`` and ``--workers N`` (for example
+``just benchmark endpoints --transport granian --concurrency 64 --workers 4``): one worker runs the
+app on one core, so RPS grows with workers until the primary's CPU or ``db_connection_budget`` is
+reached. Every worker has its own pool, see ``Settings.db_connections_total``.
+
+The benchmark seeds its own decks (named ``benchmark ...``) and deletes them when it is done.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import dataclasses
+import itertools
+import json
+import os
+import pathlib
+import socket
+import statistics
+import sys
+import time
+import typing
+
+import httpx
+import modern_di_litestar
+import sqlalchemy as sa
+from asgi_lifespan import LifespanManager
+from httpx import ASGITransport
+
+from app import importing, ioc, models
+from app.api import cards, decks
+from app.application import build_app
+from app.resources.db import create_sa_engine
+
+
+if typing.TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Callable
+
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+DECK_PREFIX: typing.Final = "benchmark"
+ROUTERS: typing.Final = (decks.ROUTER, cards.ROUTER)
+
+type Request = tuple[str, str, dict[str, typing.Any]]
+
+
+@dataclasses.dataclass(kw_only=True, slots=True, frozen=True)
+class Dataset:
+    deck_ids: list[int]
+    card_ids: dict[int, list[int]]
+
+    def deck(self, i: int) -> int:
+        return self.deck_ids[i % len(self.deck_ids)]
+
+    def card(self, i: int) -> int:
+        deck_cards = self.card_ids[self.deck(i)]
+        return deck_cards[i // len(self.deck_ids) % len(deck_cards)]
+
+
+def scenarios(dataset: Dataset) -> dict[str, Callable[[int], Request]]:
+    """Build request ``i`` of every route; keys are the route handler names."""
+    return {
+        "list_decks": lambda _: ("GET", "/api/decks/", {}),
+        "get_deck": lambda i: ("GET", f"/api/decks/{dataset.deck(i)}/", {}),
+        "get_decks_batch": lambda i: (
+            "GET",
+            "/api/decks/batch/",
+            {"params": {"ids": [dataset.deck(i + j) for j in range(20)]}},
+        ),
+        "update_deck": lambda i: (
+            "PUT",
+            f"/api/decks/{dataset.deck(i)}/",
+            {"json": {"name": f"{DECK_PREFIX} {dataset.deck(i)}", "description": f"revision {i}"}},
+        ),
+        "create_deck": lambda i: ("POST", "/api/decks/", {"json": {"name": f"{DECK_PREFIX} new {i}"}}),
+        "create_deck_with_cards": lambda i: (
+            "POST",
+            "/api/decks/with-cards/",
+            {"json": {"name": f"{DECK_PREFIX} new {i}", "cards": [{"front": f"new {j}"} for j in range(100)]}},
+        ),
+        "list_cards": lambda i: ("GET", f"/api/decks/{dataset.deck(i)}/cards/", {}),
+        "list_changes": lambda i: ("GET", f"/api/decks/{dataset.deck(i)}/changes/", {}),
+        "get_card": lambda i: ("GET", f"/api/cards/{dataset.card(i)}/", {}),
+        "create_cards": lambda i: (
+            "POST",
+            f"/api/decks/{dataset.deck(i)}/cards/",
+            {"json": [{"front": f"new {i} {j}"} for j in range(10)]},
+        ),
+        "update_cards": lambda i: (
+            "PUT",
+            f"/api/decks/{dataset.deck(i)}/cards/",
+            {
+                "json": [
+                    {"id": card_id, "front": f"front {card_id}", "back": f"revision {i}"}
+                    for card_id in dataset.card_ids[dataset.deck(i)][:10]
+                ]
+            },
+        ),
+        "import_cards": lambda i: (
+            "POST",
+            f"/api/decks/{dataset.deck(i)}/cards/import/",
+            {
+                "content": "front,back\n" + "".join(f"imported {j},revision {i}\n" for j in range(100)),
+                "headers": {"Content-Type": importing.CSV_MEDIA_TYPE},
+            },
+        ),
+    }
+
+
+def route_names() -> set[str]:
+    return {handler.handler_name for router in ROUTERS for route in router.routes for handler in route.route_handlers}
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class QueryCounter:
+    count: int = 0
+
+    def __call__(self, *_: object) -> None:
+        self.count += 1
+
+
+async def seed(engine: AsyncEngine, decks_count: int, cards_per_deck: int) -> Dataset:
+    async with engine.begin() as connection:
+        deck_ids = list(
+            await connection.scalars(
+                sa.insert(models.Deck).returning(models.Deck.id),
+                [{"name": f"{DECK_PREFIX} {i}"} for i in range(decks_count)],
+            )
+        )
+        card_ids: dict[int, list[int]] = {}
+        for deck_id in deck_ids:
+            card_ids[deck_id] = list(
+                await connection.scalars(
+                    sa.insert(models.Card).returning(models.Card.id),
+                    [{"front": f"front {i}", "back": f"back {i}", "deck_id": deck_id} for i in range(cards_per_deck)],
+                )
+            )
+    return Dataset(deck_ids=deck_ids, card_ids=card_ids)
+
+
+async def cleanup(engine: AsyncEngine) -> None:
+    async with engine.begin() as connection:
+        seeded = sa.select(models.Deck.id).where(models.Deck.name.startswith(DECK_PREFIX))
+        await connection.execute(sa.delete(models.Card).where(models.Card.deck_id.in_(seeded)))
+        await connection.execute(sa.delete(models.Deck).where(models.Deck.name.startswith(DECK_PREFIX)))
+
+
+def _percentile(cut_points: list[float], percent: int) -> float:
+    return round(cut_points[percent - 1] * 1000, 3)
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    build: Callable[[int], Request],
+    *,
+    requests: int,
+    concurrency: int,
+    queries: QueryCounter | None,
+) -> dict[str, typing.Any]:
+    counter = itertools.count()
+    latencies: list[float] = []
+    errors: list[int] = []
+
+    async def worker() -> None:
+        while (i := next(counter)) < requests:
+            method, url, kwargs = build(i)
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            if response.is_error:
+                errors.append(response.status_code)
+
+    queries_before = queries.count if queries else 0
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    cut_points = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": requests,
+        "errors": len(errors),
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": _percentile(cut_points, 50),
+        "p95_ms": _percentile(cut_points, 95),
+        "p99_ms": _percentile(cut_points, 99),
+        "queries_per_request": round((queries.count - queries_before) / requests, 2) if queries else None,
+    }
+
+
+@contextlib.asynccontextmanager
+async def asgi_client() -> AsyncIterator[tuple[httpx.AsyncClient, QueryCounter]]:
+    app = build_app()
+    async with LifespanManager(app):  # ty: ignore[invalid-argument-type]
+        engine = modern_di_litestar.fetch_di_container(app).resolve_provider(ioc.Dependencies.database_engine)
+        queries = QueryCounter()
+        sa.event.listen(engine.sync_engine, "before_cursor_execute", queries)
+        transport = ASGITransport(app=app)  # ty: ignore[invalid-argument-type]
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            yield client, queries
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.asynccontextmanager
+async def granian_client(workers: int) -> AsyncIterator[tuple[httpx.AsyncClient, None]]:
+    port = _free_port()
+    # start the server the way production does, so the APP_* granian settings of the environment apply too
+    environment = os.environ | {"APP_HOST": "127.0.0.1", "APP_PORT": str(port), "APP_WORKERS": str(workers)}
+    server = await asyncio.create_subprocess_exec(sys.executable, "-m", "app", env=environment)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits) as client:
+            for _ in range(100):
+                with contextlib.suppress(httpx.TransportError):
+                    await client.get("/api/decks/")
+                    break
+                await asyncio.sleep(0.1)
+            yield client, None
+    finally:
+        server.terminate()
+        await server.wait()
+
+
+def compare(results: dict[str, typing.Any], baseline: dict[str, typing.Any], tolerance: float) -> list[str]:
+    regressions = []
+    for name, result in results["routes"].items():
+        base = baseline["routes"].get(name)
+        if base is None:
+            continue
+        if result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95_ms']} -> {result['p95_ms']} ms")
+        if result["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {base['rps']} -> {result['rps']}")
+        if (result["queries_per_request"] or 0) > (base["queries_per_request"] or 0):
+            regressions.append(
+                f"{name}: queries per request {base['queries_per_request']} -> {result['queries_per_request']}"
+            )
+    return regressions
+
+
+async def main(args: argparse.Namespace) -> int:
+    engine = create_sa_engine()
+    try:
+        dataset = await seed(engine, args.decks, args.cards)
+        builders = scenarios(dataset)
+        if missing := route_names() - set(builders) - set(args.skip):
+            msg = f"no benchmark scenario for routes: {sorted(missing)}"
+            raise RuntimeError(msg)
+        client_factory = asgi_client() if args.transport == "asgi" else granian_client(args.workers)
+        async with client_factory as (client, queries):
+            routes = {}
+            for name, build in builders.items():
+                if name in args.skip:
+                    continue
+                await run_scenario(client, build, requests=args.warmup, concurrency=args.concurrency, queries=None)
+                routes[name] = await run_scenario(
+                    client, build, requests=args.requests, concurrency=args.concurrency, queries=queries
+                )
+    finally:
+        await cleanup(engine)
+        await engine.dispose()
+
+    results = {"transport": args.transport, "concurrency": args.concurrency, "routes": routes}
+    if args.transport == "granian":
+        results["workers"] = args.workers
+    output = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for regression in regressions:
+            sys.stderr.write(f"regression: {regression}\n")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transport", choices=("asgi", "granian"), default="asgi")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000, help="measured requests per route")
+    parser.add_argument("--warmup", type=int, default=200, help="unmeasured requests per route")
+    parser.add_argument("--workers", type=int, default=1, help="granian worker processes")
+    parser.add_argument("--decks", type=int, default=100)
+    parser.add_argument("--cards", type=int, default=200, help="cards per deck")
+    parser.add_argument("--skip", nargs="*", default=[], help="route handler names to leave out")
+    parser.add_argument("--output", type=pathlib.Path)
+    parser.add_argument("--baseline", type=pathlib.Path)
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed relative regression")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,61 @@
+"""Time a bulk CSV import of a million cards through the COPY path.
+
+Run against a migrated database: ``python -m benchmarks.import_cards``. The import runs in a
+transaction that is rolled back, so the database is left untouched.
+"""
+
+import argparse
+import asyncio
+import resource
+import sys
+import time
+import typing
+
+from app import importing, models
+from app.repositories import CardsRepository
+from app.resources.db import create_sa_engine, create_session
+
+
+if typing.TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+
+async def csv_body(size: int, chunk_rows: int = 10_000) -> AsyncIterator[bytes]:
+    yield b"front,back,hint\n"
+    for start in range(0, size, chunk_rows):
+        rows = range(start, min(start + chunk_rows, size))
+        yield "".join(f"front {i},back {i},\n" for i in rows).encode()
+
+
+async def main(size: int) -> None:
+    engine = create_sa_engine()
+    try:
+        async with engine.connect() as connection:
+            transaction = await connection.begin()
+            session = create_session(connection)  # ty: ignore[invalid-argument-type]
+            deck = models.Deck(name="benchmark")
+            session.add(deck)
+            await session.flush()
+            repository = CardsRepository(session=session, auto_commit=False)
+            cards_import = importing.CardsImport(importing.CSV_MEDIA_TYPE)
+
+            started = time.perf_counter()
+            inserted = await repository.import_cards(deck.id, cards_import.records(csv_body(size)))
+            elapsed = time.perf_counter() - started
+
+            await session.close()
+            await transaction.rollback()
+    finally:
+        await engine.dispose()
+    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    sys.stdout.write(
+        f"{inserted} cards imported in {elapsed:.2f} s ({inserted / elapsed:,.0f} rows/s)"
+        f", max RSS {max_rss_mb:.0f} MB\n"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=1_000_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.size))
@@ -0,0 +1,51 @@
+"""Compare the checkout latency of the two pool liveness modes.
+
+Run against a database: ``python -m benchmarks.pool_liveness``. Every sample checks a connection out of
+the pool and runs one short query, as a request does. With ``pre_ping`` each checkout first spends a
+``SELECT 1`` round trip; with ``background`` idle connections are pinged by ``PoolHealthChecker`` instead,
+so the difference of the two is the latency every request saves.
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import typing
+
+import sqlalchemy as sa
+
+from app.resources.db import create_sa_engine
+from app.settings import PoolLiveness
+
+
+async def measure(liveness: PoolLiveness, requests: int) -> list[float]:
+    engine = create_sa_engine(liveness=liveness)
+    statement = sa.select(1)
+    latencies = []
+    try:
+        for _ in range(requests):
+            started = time.perf_counter()
+            async with engine.connect() as connection:
+                await connection.execute(statement)
+            latencies.append(time.perf_counter() - started)
+    finally:
+        await engine.dispose()
+    # the first checkout opens the connection
+    return latencies[1:]
+
+
+async def main(requests: int) -> None:
+    for liveness in typing.get_args(PoolLiveness.__value__):
+        latencies = await measure(liveness, requests)
+        cut_points = statistics.quantiles(latencies, n=100, method="inclusive")
+        sys.stdout.write(
+            f"{liveness:>10}: mean {statistics.mean(latencies) * 1000:7.3f} ms, "
+            f"p95 {cut_points[94] * 1000:7.3f} ms per checkout and query\n"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    asyncio.run(main(parser.parse_args().requests))
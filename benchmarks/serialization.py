@@ -0,0 +1,46 @@
+"""Compare the pydantic response path of ``list_cards`` with the msgspec fast path.
+
+Run with ``python -m benchmarks.serialization``; no database is needed. The pydantic path validates
+ORM objects into ``schemas.Cards`` and lets Litestar encode the model, the fast path encodes plain
+rows straight to JSON bytes.
+"""
+
+import argparse
+import sys
+import timeit
+
+from litestar.serialization import encode_json
+from sqlalchemy.engine import IteratorResult
+from sqlalchemy.engine.result import SimpleResultMetaData
+
+from app import encoding, models, schemas
+
+
+COLUMNS = ["id", "front", "back", "hint", "deck_id"]
+
+
+def main(size: int, rounds: int) -> None:
+    values = [(i, f"front {i}", f"back {i}", None, 1) for i in range(1, size + 1)]
+    objects = [models.Card(**dict(zip(COLUMNS, row, strict=True))) for row in values]
+    rows = IteratorResult(SimpleResultMetaData(COLUMNS), iter(values)).all()
+
+    def pydantic_path() -> bytes:
+        return encode_json(schemas.Cards.from_models(objects, next_cursor=None))
+
+    def fast_path() -> bytes:
+        return encoding.encode(schemas.Cards, {"items": rows, "next_cursor": None})
+
+    if pydantic_path() != fast_path():
+        msg = "fast path output differs from the pydantic path"
+        raise RuntimeError(msg)
+    for name, function in (("pydantic", pydantic_path), ("msgspec", fast_path)):
+        best = min(timeit.repeat(function, number=1, repeat=rounds))
+        sys.stdout.write(f"{name:>8}: {best * 1000:8.2f} ms per {size} cards\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+    main(args.size, args.rounds)
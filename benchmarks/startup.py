@@ -0,0 +1,81 @@
+"""Measure how long a worker takes to import, build and start the app, and how slow its first requests are.
+
+Run against a migrated database: ``python -m benchmarks.startup``. Import and build times come from
+fresh interpreters, once without and once with ``OPENTELEMETRY_ENDPOINT``, as tracing packages are only
+imported when configured. The first burst sends ``db_pool_size`` concurrent requests right after startup,
+with the pool warm-up (``DB_POOL_WARM_UP``) off and on: a cold pool makes them open connections and
+prepare statements first.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+import modern_di_litestar
+from asgi_lifespan import LifespanManager
+from httpx import ASGITransport
+
+from app.application import build_app
+from app.settings import settings
+
+
+IMPORT_AND_BUILD = """
+import sys, time
+started = time.perf_counter()
+import app.application
+imported = time.perf_counter()
+app.application.build_app()
+sys.stdout.write(f"{imported - started} {time.perf_counter() - imported}")
+"""
+
+
+async def import_and_build(rounds: int, opentelemetry_endpoint: str) -> tuple[float, float]:
+    environment = os.environ | {"OPENTELEMETRY_ENDPOINT": opentelemetry_endpoint}
+    samples = []
+    for _ in range(rounds):
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-c", IMPORT_AND_BUILD, env=environment, stdout=asyncio.subprocess.PIPE
+        )
+        output, _ = await process.communicate()
+        samples.append(tuple(map(float, output.split())))
+    return min(x[0] for x in samples), min(x[1] for x in samples)
+
+
+async def first_burst(warm_up: bool) -> tuple[float, float]:
+    settings.db_pool_warm_up = warm_up
+    app = build_app()
+    started = time.perf_counter()
+    async with LifespanManager(app):  # ty: ignore[invalid-argument-type]
+        startup = time.perf_counter() - started
+        async with httpx.AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:  # ty: ignore[invalid-argument-type]
+
+            async def request() -> float:
+                request_started = time.perf_counter()
+                (await client.get("/api/decks/")).raise_for_status()
+                return time.perf_counter() - request_started
+
+            latencies = await asyncio.gather(*(request() for _ in range(settings.db_pool_size)))
+    await modern_di_litestar.fetch_di_container(app).close_async()
+    return startup, statistics.mean(latencies)
+
+
+async def main(rounds: int) -> None:
+    for label, endpoint in (("tracing off", ""), ("tracing on", "http://127.0.0.1:4317")):
+        imported, built = await import_and_build(rounds, endpoint)
+        sys.stdout.write(f"{label:>12}: import {imported * 1000:8.1f} ms, build_app {built * 1000:8.1f} ms\n")
+    for warm_up in (False, True):
+        startups, latencies = zip(*[await first_burst(warm_up) for _ in range(rounds)], strict=True)
+        sys.stdout.write(
+            f"{'warm-up on' if warm_up else 'warm-up off':>12}: startup {min(startups) * 1000:8.1f} ms, "
+            f"first {settings.db_pool_size} requests {statistics.median(latencies) * 1000:8.1f} ms on average\n"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=5)
+    asyncio.run(main(parser.parse_args().rounds))
@@ -0,0 +1,97 @@
+"""Compare ``PUT /decks/{deck_id}/cards/`` upsert paths on a deck of 10k cards.
+
+Run against a migrated database: ``python -m benchmarks.upsert_cards``. Every round runs in a
+transaction that is rolled back, so the database is left untouched. ``--changed`` sets the share of
+cards that differ from the stored ones; a client resending a whole deck usually changes only a few.
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import typing
+
+from app import models, schemas
+from app.repositories import CardsRepository
+from app.resources.db import create_sa_engine, create_session
+
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Sequence
+
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def upsert_many(repository: CardsRepository, deck_id: int, cards: list[schemas.Card]) -> Sequence[models.Card]:
+    """Run the previous path: advanced-alchemy selects the existing rows, merges them and flushes."""
+    return await repository.upsert_many(
+        [models.Card(**card.model_dump(exclude={"deck_id"}), deck_id=deck_id) for card in cards],
+    )
+
+
+async def on_conflict(repository: CardsRepository, deck_id: int, cards: list[schemas.Card]) -> Sequence[models.Card]:
+    return (await repository.upsert_cards(deck_id, cards)).cards
+
+
+PATHS: typing.Final[dict[str, Callable[[CardsRepository, int, list[schemas.Card]], Awaitable[object]]]] = {
+    "upsert_many": upsert_many,
+    "on_conflict": on_conflict,
+}
+
+
+async def _seed(session: AsyncSession, size: int) -> tuple[int, list[int]]:
+    deck = models.Deck(name="benchmark")
+    session.add(deck)
+    await session.flush()
+    cards = [models.Card(front=f"front {i}", deck_id=deck.id) for i in range(size)]
+    session.add_all(cards)
+    await session.flush()
+    return deck.id, [card.id for card in cards]
+
+
+async def run_round(path: str, size: int, changed: float) -> float:
+    engine = create_sa_engine()
+    try:
+        async with engine.connect() as connection:
+            transaction = await connection.begin()
+            session = create_session(connection)  # ty: ignore[invalid-argument-type]
+            deck_id, card_ids = await _seed(session, size)
+            session.expunge_all()
+            payload = [
+                schemas.Card(id=card_id, front=f"front {i} updated", back=f"back {i}")
+                if i < size * changed
+                else schemas.Card(id=card_id, front=f"front {i}")
+                for i, card_id in enumerate(card_ids)
+            ]
+            repository = CardsRepository(session=session, auto_commit=False)
+
+            started = time.perf_counter()
+            await PATHS[path](repository, deck_id, payload)
+            await session.flush()
+            elapsed = time.perf_counter() - started
+
+            await session.close()
+            await transaction.rollback()
+    finally:
+        await engine.dispose()
+    return elapsed
+
+
+async def main(size: int, rounds: int, changed: float) -> None:
+    sys.stdout.write(f"{size} cards per PUT, {changed:.0%} of them changed, {rounds} rounds\n")
+    for path in PATHS:
+        timings = [await run_round(path, size, changed) for _ in range(rounds)]
+        sys.stdout.write(
+            f"{path:<12} median {statistics.median(timings) * 1000:9.1f} ms"
+            f"  min {min(timings) * 1000:9.1f} ms  max {max(timings) * 1000:9.1f} ms\n"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--changed", type=float, default=1.0, help="share of cards that differ, from 0 to 1")
+    args = parser.parse_args()
+    asyncio.run(main(args.size, args.rounds, args.changed))
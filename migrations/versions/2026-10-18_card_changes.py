@@ -0,0 +1,95 @@
+"""card changes.
+
+Revision ID: 227c5dc03f15
+Revises: 3f464fde49d0
+Create Date: 2026-10-18 16:40:12.381904
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "227c5dc03f15"
+down_revision = "3f464fde49d0"
+branch_labels = None
+depends_on = None
+
+# pg_current_xact_id() of the writing transaction orders the change feed by commit: every transaction
+# below the oldest running one is over, so its rows can no longer appear behind a cursor
+CARDS_XACT_ID_FUNCTION = """
+CREATE FUNCTION cards_xact_id() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.xact_id := pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END
+$$
+"""
+
+# a card leaves its deck when it is deleted or an UPDATE (including ON CONFLICT DO UPDATE) moves it to
+# another deck
+CARD_TOMBSTONES_FUNCTION = """
+CREATE FUNCTION cards_tombstones() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO card_tombstones (card_id, deck_id, xact_id, created_at, updated_at)
+        SELECT id, deck_id, pg_current_xact_id()::text::bigint, statement_timestamp(), statement_timestamp()
+        FROM old_cards
+        WHERE deck_id IS NOT NULL;
+    ELSE
+        INSERT INTO card_tombstones (card_id, deck_id, xact_id, created_at, updated_at)
+        SELECT
+            old_cards.id, old_cards.deck_id, pg_current_xact_id()::text::bigint,
+            statement_timestamp(), statement_timestamp()
+        FROM old_cards JOIN new_cards ON new_cards.id = old_cards.id
+        WHERE old_cards.deck_id IS NOT NULL AND old_cards.deck_id IS DISTINCT FROM new_cards.deck_id;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+TRIGGERS = {
+    "UPDATE": "REFERENCING OLD TABLE AS old_cards NEW TABLE AS new_cards",
+    "DELETE": "REFERENCING OLD TABLE AS old_cards",
+}
+
+
+def upgrade() -> None:
+    # a constant default keeps the ALTER from rewriting the table; existing rows sort before every new change
+    op.add_column("cards", sa.Column("xact_id", sa.BigInteger(), server_default="0", nullable=False))
+    op.execute(CARDS_XACT_ID_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER cards_xact_id BEFORE INSERT OR UPDATE ON cards FOR EACH ROW EXECUTE FUNCTION cards_xact_id()"
+    )
+    op.create_index("ix_cards_deck_id_xact_id_id", "cards", ["deck_id", "xact_id", "id"])
+    op.create_table(
+        "card_tombstones",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("card_id", sa.Integer(), nullable=False),
+        sa.Column("deck_id", sa.Integer(), nullable=True),
+        sa.Column("xact_id", sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(["deck_id"], ["decks.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_card_tombstones_deck_id_xact_id_id", "card_tombstones", ["deck_id", "xact_id", "id"])
+    op.execute(CARD_TOMBSTONES_FUNCTION)
+    for event, referencing in TRIGGERS.items():
+        op.execute(
+            f"CREATE TRIGGER cards_tombstones_{event.lower()} AFTER {event} ON cards {referencing} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION cards_tombstones()"
+        )
+
+
+def downgrade() -> None:
+    for event in TRIGGERS:
+        op.execute(f"DROP TRIGGER cards_tombstones_{event.lower()} ON cards")
+    op.execute("DROP FUNCTION cards_tombstones()")
+    op.drop_index("ix_card_tombstones_deck_id_xact_id_id", table_name="card_tombstones")
+    op.drop_table("card_tombstones")
+    op.drop_index("ix_cards_deck_id_xact_id_id", table_name="cards")
+    op.execute("DROP TRIGGER cards_xact_id ON cards")
+    op.execute("DROP FUNCTION cards_xact_id()")
+    op.drop_column("cards", "xact_id")
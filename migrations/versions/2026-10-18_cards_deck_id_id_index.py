@@ -0,0 +1,24 @@
+"""cards deck_id id index.
+
+Revision ID: 3f9c1d2e7a41
+Revises: abb62721e019
+Create Date: 2026-10-18 09:12:31.204118
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "3f9c1d2e7a41"
+down_revision = "abb62721e019"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_cards_deck_id_id", "cards", ["deck_id", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_cards_deck_id_id", table_name="cards")
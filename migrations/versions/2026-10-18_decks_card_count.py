@@ -0,0 +1,86 @@
+"""decks card_count.
+
+Revision ID: 3f464fde49d0
+Revises: 3f9c1d2e7a41
+Create Date: 2026-10-18 14:02:47.518226
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "3f464fde49d0"
+down_revision = "3f9c1d2e7a41"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+# one statement-level trigger per event: every INSERT, UPDATE (including ON CONFLICT DO UPDATE and cards
+# moved between decks) and DELETE on cards adjusts the counts of the touched decks once, by the net change
+CARD_COUNT_FUNCTION = """
+CREATE FUNCTION decks_card_count() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE decks SET card_count = decks.card_count + delta.n
+        FROM (SELECT deck_id, count(*) AS n FROM new_cards GROUP BY deck_id) AS delta
+        WHERE decks.id = delta.deck_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE decks SET card_count = decks.card_count - delta.n
+        FROM (SELECT deck_id, count(*) AS n FROM old_cards GROUP BY deck_id) AS delta
+        WHERE decks.id = delta.deck_id;
+    ELSE
+        UPDATE decks SET card_count = decks.card_count + delta.n
+        FROM (
+            SELECT deck_id, sum(n) AS n
+            FROM (
+                SELECT deck_id, count(*) AS n FROM new_cards GROUP BY deck_id
+                UNION ALL
+                SELECT deck_id, -count(*) AS n FROM old_cards GROUP BY deck_id
+            ) AS changes
+            GROUP BY deck_id
+            HAVING sum(n) <> 0
+        ) AS delta
+        WHERE decks.id = delta.deck_id;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+TRIGGERS = {
+    "INSERT": "REFERENCING NEW TABLE AS new_cards",
+    "UPDATE": "REFERENCING OLD TABLE AS old_cards NEW TABLE AS new_cards",
+    "DELETE": "REFERENCING OLD TABLE AS old_cards",
+}
+
+
+def upgrade() -> None:
+    op.add_column("decks", sa.Column("card_count", sa.Integer(), server_default="0", nullable=False))
+    op.execute(CARD_COUNT_FUNCTION)
+    for event, referencing in TRIGGERS.items():
+        op.execute(
+            f"CREATE TRIGGER cards_card_count_{event.lower()} AFTER {event} ON cards {referencing} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION decks_card_count()"
+        )
+
+    # the triggers keep counts exact from here on; the backfill commits per batch to keep row locks short
+    with op.get_context().autocommit_block():
+        connection = op.get_bind()
+        max_id = connection.scalar(sa.text("SELECT max(id) FROM decks")) or 0
+        for start in range(0, max_id, BACKFILL_BATCH_SIZE):
+            connection.execute(
+                sa.text(
+                    "UPDATE decks SET card_count = (SELECT count(*) FROM cards WHERE cards.deck_id = decks.id) "
+                    "WHERE id > :start AND id <= :end"
+                ),
+                {"start": start, "end": start + BACKFILL_BATCH_SIZE},
+            )
+
+
+def downgrade() -> None:
+    for event in TRIGGERS:
+        op.execute(f"DROP TRIGGER cards_card_count_{event.lower()} ON cards")
+    op.execute("DROP FUNCTION decks_card_count()")
+    op.drop_column("decks", "card_count")
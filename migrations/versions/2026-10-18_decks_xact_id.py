@@ -0,0 +1,51 @@
+"""decks xact_id.
+
+Revision ID: 58d56852e94c
+Revises: 227c5dc03f15
+Create Date: 2026-10-18 19:26:05.730412
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "58d56852e94c"
+down_revision = "227c5dc03f15"
+branch_labels = None
+depends_on = None
+
+# INSERT and DELETE on cards change card_count, and that UPDATE of decks already sets xact_id through the row
+# trigger; an UPDATE of cards may leave every count as it was, so it touches the decks of its rows itself
+CARDS_UPDATE_FUNCTION = """
+CREATE FUNCTION decks_xact_id() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE decks SET xact_id = pg_current_xact_id()::text::bigint
+    WHERE id IN (SELECT deck_id FROM new_cards UNION SELECT deck_id FROM old_cards);
+    RETURN NULL;
+END
+$$
+"""
+
+
+def upgrade() -> None:
+    # a constant default keeps the ALTER from rewriting the table; existing decks keep one version until written
+    op.add_column("decks", sa.Column("xact_id", sa.BigInteger(), server_default="0", nullable=False))
+    # cards_xact_id() of the card_changes migration only sets NEW.xact_id, so it serves decks as well
+    op.execute(
+        "CREATE TRIGGER decks_xact_id BEFORE INSERT OR UPDATE ON decks FOR EACH ROW EXECUTE FUNCTION cards_xact_id()"
+    )
+    op.execute(CARDS_UPDATE_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER cards_decks_xact_id AFTER UPDATE ON cards "
+        "REFERENCING OLD TABLE AS old_cards NEW TABLE AS new_cards "
+        "FOR EACH STATEMENT EXECUTE FUNCTION decks_xact_id()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER cards_decks_xact_id ON cards")
+    op.execute("DROP FUNCTION decks_xact_id()")
+    op.execute("DROP TRIGGER decks_xact_id ON decks")
+    op.drop_column("decks", "xact_id")
@@ -10,13 +10,34 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app import ioc
 from app.application import build_app
 from app.resources.db import create_sa_engine
+from app.settings import settings
 
 
 if typing.TYPE_CHECKING:
+    from collections.abc import Callable
+
+    import httpx
     import litestar
     import modern_di
 
 
+@pytest.fixture(autouse=True)
+def strict_query_budget(monkeypatch: pytest.MonkeyPatch) -> None:
+    # a request over its query budget fails with a 500, and the test with it, instead of logging a warning
+    monkeypatch.setattr(settings, "query_budget_raise", True)
+
+
+@pytest.fixture
+def query_count() -> Callable[[httpx.Response], int]:
+    """Return the number of statements a response reports in its ``Server-Timing`` header."""
+
+    def parse(response: httpx.Response) -> int:
+        timing = response.headers["server-timing"]
+        return int(timing.split('desc="', 1)[1].split(" ", 1)[0])
+
+    return parse
+
+
 @pytest.fixture
 async def app() -> typing.AsyncIterator[litestar.Litestar]:
     app_ = build_app()
@@ -48,6 +69,7 @@ async def db_session(di_container: modern_di.Container) -> typing.AsyncIterator[
     connection = await engine.connect()
     transaction = await connection.begin()
     di_container.override(ioc.Dependencies.database_engine, connection)
+    di_container.override(ioc.Dependencies.read_engine, connection)
 
     try:
         yield AsyncSession(
@@ -9,6 +9,7 @@ class DeckModelFactory(SQLAlchemyFactory[models.Deck]):
     __set_relationships__ = False
     __check_model__ = False
     id = None
+    card_count = 0
 
 
 class CardModelFactory(SQLAlchemyFactory[models.Card]):
@@ -0,0 +1,100 @@
+import asyncio
+import typing
+
+from litestar import status_codes
+
+from app import ioc
+from app.admission import PRIMARY_READ, READ, WRITE, AdmissionControl, Gate, GateStats, create_admission_control
+from app.resources.replicas import STICKY_PRIMARY_COOKIE, ReplicaRouter
+from app.settings import settings
+
+
+if typing.TYPE_CHECKING:
+    import modern_di
+    import pytest
+    from httpx import AsyncClient
+
+
+async def test_gate_queues_then_sheds() -> None:
+    gate = Gate(limit=1, queue_size=1, queue_timeout=0.05)
+    assert await gate.acquire()
+
+    queued = asyncio.create_task(gate.acquire())
+    await asyncio.sleep(0)
+    assert not await gate.acquire()
+    assert not await queued
+
+    gate.release()
+    assert await gate.acquire()
+    assert gate.stats == GateStats(admitted=2, queued=1, rejected=2)
+
+
+async def test_gate_admits_queued_request_on_release() -> None:
+    gate = Gate(limit=1, queue_size=1, queue_timeout=1)
+    assert await gate.acquire()
+
+    queued = asyncio.create_task(gate.acquire())
+    await asyncio.sleep(0)
+    gate.release()
+
+    assert await queued
+    assert gate.stats == GateStats(admitted=2, queued=1, rejected=0)
+
+
+async def test_admission_rejects_with_retry_after(client: AsyncClient, di_container: modern_di.Container) -> None:
+    closed = Gate(limit=0, queue_size=0, queue_timeout=0)
+    open_ = Gate(limit=1, queue_size=0, queue_timeout=0)
+    di_container.override(ioc.Dependencies.admission_control, AdmissionControl({READ: closed, WRITE: open_}, 7))
+
+    response = await client.get("/api/decks/")
+    assert response.status_code == status_codes.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["retry-after"] == "7"
+
+    response = await client.post("/api/decks/", json={})
+    assert response.status_code == status_codes.HTTP_400_BAD_REQUEST
+    assert (closed.stats.rejected, open_.stats.admitted) == (1, 1)
+
+
+def test_gates_split_the_primary_pool(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "db_pool_size", 5)
+    monkeypatch.setattr(settings, "db_max_overflow", 2)
+
+    control = create_admission_control(ReplicaRouter([], retry_after=60))
+    assert (control.gates[READ].limit, control.gates[WRITE].limit) == (4, 3)
+    assert control.gates[PRIMARY_READ] is control.gates[READ]
+
+    monkeypatch.setattr(settings, "admission_read_limit", 10)
+    control = create_admission_control(ReplicaRouter([], retry_after=60))
+    assert (control.gates[READ].limit, control.gates[WRITE].limit) == (10, 3)
+
+
+async def test_read_gate_sized_from_replica_pools(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "db_pool_size", 5)
+    monkeypatch.setattr(settings, "db_max_overflow", 2)
+    replicas = ReplicaRouter([settings.db_dsn_parsed, settings.db_dsn_parsed], retry_after=60)
+    try:
+        control = create_admission_control(replicas)
+    finally:
+        await replicas.dispose()
+    assert (control.gates[READ].limit, control.gates[WRITE].limit) == (14, 7)
+    # the primary pool is shared by writes and the reads that go to the primary
+    assert control.gates[PRIMARY_READ] is control.gates[WRITE]
+
+
+async def test_primary_reads_use_primary_gate(client: AsyncClient, di_container: modern_di.Container) -> None:
+    replica = Gate(limit=1, queue_size=0, queue_timeout=0)
+    primary = Gate(limit=0, queue_size=0, queue_timeout=0)
+    di_container.override(
+        ioc.Dependencies.admission_control,
+        AdmissionControl({READ: replica, WRITE: primary, PRIMARY_READ: primary}, 1),
+    )
+
+    # routes that read the primary, and any read of a client stuck to the primary after a write
+    sticky = {"Cookie": f"{STICKY_PRIMARY_COOKIE}=1"}
+    for url, headers in (("/api/decks/1/", {}), ("/api/cards/1/", {}), ("/api/decks/", sticky)):
+        response = await client.get(url, headers=headers)
+        assert response.status_code == status_codes.HTTP_503_SERVICE_UNAVAILABLE
+
+    response = await client.get("/api/decks/")
+    assert response.status_code == status_codes.HTTP_200_OK
+    assert (primary.stats.rejected, replica.stats.admitted) == (3, 1)
@@ -0,0 +1,219 @@
+import asyncio
+from typing import TYPE_CHECKING
+
+import pytest
+from litestar import status_codes
+
+from app import cache
+from tests import factories
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    import httpx
+    import modern_di
+    from httpx import AsyncClient
+
+
+def _cached(content: bytes, deck_id: int) -> cache.CachedResponse:
+    return cache.CachedResponse(content=content, deck_id=deck_id)
+
+
+def test_response_cache_lru_eviction() -> None:
+    response_cache = cache.ResponseCache(max_size=2, ttl=60)
+    response_cache.set(cache.deck_key(1), _cached(b"1", 1))
+    response_cache.set(cache.deck_key(2), _cached(b"2", 2))
+    assert response_cache.get(cache.deck_key(1)) == _cached(b"1", 1)
+
+    response_cache.set(cache.deck_key(3), _cached(b"3", 3))
+
+    assert len(response_cache) == 2  # noqa: PLR2004
+    assert response_cache.get(cache.deck_key(2)) is None
+    assert response_cache.get(cache.deck_key(3)) == _cached(b"3", 3)
+    assert response_cache.stats == cache.CacheStats(hits=2, misses=1, evictions=1)
+
+
+def test_response_cache_ttl_expiry() -> None:
+    response_cache = cache.ResponseCache(max_size=2, ttl=0)
+    response_cache.set(cache.card_key(1), _cached(b"1", 1))
+
+    assert response_cache.get(cache.card_key(1)) is None
+    assert len(response_cache) == 0
+    assert response_cache.stats == cache.CacheStats(hits=0, misses=1, evictions=1)
+
+
+def test_response_cache_invalidate_deck_drops_its_cards() -> None:
+    response_cache = cache.ResponseCache(max_size=3, ttl=60)
+    response_cache.set(cache.deck_key(1), _cached(b"deck", 1))
+    response_cache.set(cache.card_key(10), _cached(b"card", 1))
+    response_cache.set(cache.card_key(20), _cached(b"other card", 2))
+
+    response_cache.invalidate_deck(1)
+
+    assert response_cache.get(cache.card_key(20)) == _cached(b"other card", 2)
+    assert len(response_cache) == 1
+
+
+async def test_response_cache_skips_store_after_racing_invalidation() -> None:
+    response_cache = cache.ResponseCache(max_size=2, ttl=60)
+
+    async def load() -> cache.CachedResponse:
+        response_cache.invalidate(cache.deck_key(1))
+        return _cached(b"stale", 1)
+
+    assert await response_cache.fetch(cache.deck_key(1), load) == _cached(b"stale", 1)
+    assert len(response_cache) == 0
+
+
+class _BlockingLoad:
+    def __init__(self, *results: cache.CachedResponse | Exception) -> None:
+        self.results = list(results)
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self) -> cache.CachedResponse:
+        self.calls += 1
+        await self.release.wait()
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+async def test_response_cache_coalesces_concurrent_misses() -> None:
+    response_cache = cache.ResponseCache(max_size=2, ttl=60)
+    load = _BlockingLoad(_cached(b"deck", 1))
+
+    tasks = [asyncio.create_task(response_cache.fetch(cache.deck_key(1), load)) for _ in range(4)]
+    await asyncio.sleep(0)
+    tasks[1].cancel()
+    load.release.set()
+
+    assert [await x for x in (tasks[0], *tasks[2:])] == [_cached(b"deck", 1)] * 3
+    assert tasks[1].cancelled()
+    assert load.calls == 1
+    assert response_cache.stats.coalesced == 3  # noqa: PLR2004
+    assert response_cache.get(cache.deck_key(1)) == _cached(b"deck", 1)
+
+
+async def test_response_cache_follower_loads_after_leader_is_cancelled() -> None:
+    response_cache = cache.ResponseCache(max_size=2, ttl=60)
+    load = _BlockingLoad(_cached(b"deck", 1))
+
+    leader = asyncio.create_task(response_cache.fetch(cache.deck_key(1), load))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(response_cache.fetch(cache.deck_key(1), load))
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    load.release.set()
+
+    assert await follower == _cached(b"deck", 1)
+    assert leader.cancelled()
+    assert load.calls == 2  # noqa: PLR2004
+
+
+async def test_response_cache_shares_load_errors() -> None:
+    response_cache = cache.ResponseCache(max_size=2, ttl=60)
+    load = _BlockingLoad(LookupError("missing"))
+
+    tasks = [asyncio.create_task(response_cache.fetch(cache.deck_key(1), load)) for _ in range(2)]
+    await asyncio.sleep(0)
+    load.release.set()
+
+    for task in tasks:
+        with pytest.raises(LookupError, match="missing"):
+            await task
+    assert load.calls == 1
+
+
+async def test_response_cache_does_not_join_load_started_before_invalidation() -> None:
+    response_cache = cache.ResponseCache(max_size=2, ttl=60)
+    load = _BlockingLoad(_cached(b"stale", 1), _cached(b"fresh", 1))
+
+    stale = asyncio.create_task(response_cache.fetch(cache.deck_key(1), load))
+    await asyncio.sleep(0)
+    response_cache.invalidate_deck(1)
+    fresh = asyncio.create_task(response_cache.fetch(cache.deck_key(1), load))
+    await asyncio.sleep(0)
+    load.release.set()
+
+    assert (await stale, await fresh) == (_cached(b"stale", 1), _cached(b"fresh", 1))
+    assert response_cache.stats.coalesced == 0
+    assert response_cache.get(cache.deck_key(1)) == _cached(b"fresh", 1)
+
+
+@pytest.mark.usefixtures("set_async_session_in_base_sqlalchemy_factory")
+async def test_get_deck_cached_until_write(client: AsyncClient, di_container: modern_di.Container) -> None:
+    response_cache = di_container.resolve(cache.ResponseCache)
+    deck = await factories.DeckModelFactory.create_async()
+
+    response = await client.get(f"/api/decks/{deck.id}/")
+    assert response.status_code == status_codes.HTTP_200_OK
+    response = await client.get(f"/api/decks/{deck.id}/")
+    assert response.status_code == status_codes.HTTP_200_OK
+    assert response.json()["cards"] == []
+    assert response_cache.stats.hits == 1
+
+    response = await client.post(f"/api/decks/{deck.id}/cards/", json=[{"front": "front"}])
+    assert response.status_code == status_codes.HTTP_201_CREATED
+    response = await client.get(f"/api/decks/{deck.id}/")
+    assert [x["front"] for x in response.json()["cards"]] == ["front"]
+
+    response = await client.put(f"/api/decks/{deck.id}/", json={"name": "renamed"})
+    assert response.status_code == status_codes.HTTP_200_OK
+    response = await client.get(f"/api/decks/{deck.id}/")
+    assert response.json()["name"] == "renamed"
+
+
+@pytest.mark.usefixtures("set_async_session_in_base_sqlalchemy_factory")
+async def test_conditional_get_answers_from_cache(
+    client: AsyncClient, di_container: modern_di.Container, query_count: Callable[[httpx.Response], int]
+) -> None:
+    response_cache = di_container.resolve(cache.ResponseCache)
+    deck = await factories.DeckModelFactory.create_async()
+    card = await factories.CardModelFactory.create_async(deck_id=deck.id)
+
+    for url in (f"/api/decks/{deck.id}/", f"/api/cards/{card.id}/"):
+        etag = (await client.get(url)).headers["etag"]
+        response = await client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == status_codes.HTTP_304_NOT_MODIFIED
+        assert query_count(response) == 0
+
+        # a miss reads the same version from the row alone
+        response_cache.clear()
+        response = await client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == status_codes.HTTP_304_NOT_MODIFIED
+        assert query_count(response) == 1
+
+
+@pytest.mark.usefixtures("set_async_session_in_base_sqlalchemy_factory")
+async def test_get_card_cached_until_write(client: AsyncClient) -> None:
+    deck = await factories.DeckModelFactory.create_async()
+    card = await factories.CardModelFactory.create_async(deck_id=deck.id)
+
+    response = await client.get(f"/api/cards/{card.id}/")
+    assert response.status_code == status_codes.HTTP_200_OK
+
+    response = await client.put(f"/api/decks/{deck.id}/cards/", json=[{"id": card.id, "front": "updated"}])
+    assert response.status_code == status_codes.HTTP_200_OK
+    response = await client.get(f"/api/cards/{card.id}/")
+    assert response.json()["front"] == "updated"
+
+
+@pytest.mark.usefixtures("set_async_session_in_base_sqlalchemy_factory")
+async def test_moving_a_card_invalidates_its_old_deck(client: AsyncClient) -> None:
+    source, target = await factories.DeckModelFactory.create_batch_async(size=2)
+    card = await factories.CardModelFactory.create_async(deck_id=source.id)
+    response = await client.get(f"/api/decks/{source.id}/")
+    assert [x["id"] for x in response.json()["cards"]] == [card.id]
+    etag = response.headers["etag"]
+
+    response = await client.put(f"/api/decks/{target.id}/cards/", json=[{"id": card.id, "front": card.front}])
+    assert response.status_code == status_codes.HTTP_200_OK
+
+    response = await client.get(f"/api/decks/{source.id}/", headers={"If-None-Match": etag})
+    assert response.status_code == status_codes.HTTP_200_OK
+    assert response.json()["cards"] == []
+    assert response.headers["etag"] != etag
@@ -1,13 +1,18 @@
+import json
 from typing import TYPE_CHECKING
 
 import pytest
+import sqlalchemy as sa
 from litestar import status_codes
 
+from app import models, pagination, streaming
+from app.settings import settings
 from tests import factories
 
 
 if TYPE_CHECKING:
     from httpx import AsyncClient
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 
 pytestmark = [pytest.mark.usefixtures("set_async_session_in_base_sqlalchemy_factory")]
@@ -19,6 +24,8 @@ async def test_get_cards_empty(client: AsyncClient) -> None:
     response = await client.get(f"/api/decks/{deck.id}/cards/")
     assert response.status_code == status_codes.HTTP_200_OK
     assert len(response.json()["items"]) == 0
+    assert response.headers["etag"].startswith('W/"0-')
+    assert "last-modified" not in response.headers
 
     response = await client.get("/api/cards/0/")
     assert response.status_code == status_codes.HTTP_404_NOT_FOUND
@@ -36,6 +43,57 @@ async def test_get_cards(client: AsyncClient) -> None:
         assert v == getattr(card, k)
 
 
+async def test_get_cards_pagination(client: AsyncClient) -> None:
+    deck = await factories.DeckModelFactory.create_async()
+    cards = await factories.CardModelFactory.create_batch_async(size=3, deck_id=deck.id)
+
+    response = await client.get(f"/api/decks/{deck.id}/cards/", params={"limit": 2})
+    assert response.status_code == status_codes.HTTP_200_OK
+    data = response.json()
+    assert [x["id"] for x in data["items"]] == [x.id for x in cards[:2]]
+    assert data["next_cursor"]
+
+    response = await client.get(f"/api/decks/{deck.id}/cards/", params={"limit": 2, "cursor": data["next_cursor"]})
+    assert response.status_code == status_codes.HTTP_200_OK
+    data = response.json()
+    assert [x["id"] for x in data["items"]] == [cards[2].id]
+    assert data["next_cursor"] is None
+
+
+async def test_get_cards_cursor_from_other_deck(client: AsyncClient) -> None:
+    deck = await factories.DeckModelFactory.create_async()
+
+    response = await client.get(
+        f"/api/decks/{deck.id}/cards/", params={"cursor": pagination.encode_cursor(deck.id + 1, 1)}
+    )
+    assert response.status_code == status_codes.HTTP_400_BAD_REQUEST, response.text
+
+
+async def test_get_cards_stream_ndjson(client: AsyncClient) -> None:
+    deck = await factories.DeckModelFactory.create_async()
+    cards = await factories.CardModelFactory.create_batch_async(size=3, deck_id=deck.id)
+
+    response = await client.get(f"/api/decks/{deck.id}/cards/", headers={"Accept": streaming.NDJSON_MEDIA_TYPE})
+    assert response.status_code == status_codes.HTTP_200_OK
+    assert response.headers["content-type"].startswith(streaming.NDJSON_MEDIA_TYPE)
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [x["id"] for x in lines] == [x.id for x in cards]
+
+
+@pytest.mark.parametrize("cards_count", [0, 3])
+async def test_get_cards_stream_json(client: AsyncClient, cards_count: int) -> None:
+    deck = await factories.DeckModelFactory.create_async()
+    await factories.CardModelFactory.create_batch_async(size=cards_count, deck_id=deck.id)
+
+    response = await client.get(f"/api/decks/{deck.id}/cards/", params={"stream": True})
+    assert response.status_code == status_codes.HTTP_200_OK
+    streamed = response.json()
+
+    response = await client.get(f"/api/decks/{deck.id}/cards/")
+    assert response.status_code == status_codes.HTTP_200_OK
+    assert streamed == response.json()
+
+
 async def test_get_card(client: AsyncClient) -> None:
     deck = await factories.DeckModelFactory.create_async()
     card = await factories.CardModelFactory.create_async(deck_id=deck.id)
@@ -50,6 +108,51 @@ async def test_get_card_not_exist(client: AsyncClient) -> None:
     response = await client.get("/api/cards/999/")
     assert response.status_code == status_codes.HTTP_404_NOT_FOUND
 
+    response = await client.get("/api/cards/999/", headers={"If-None-Match": "*"})
+    assert response.status_code == status_codes.HTTP_404_NOT_FOUND
+
+
+async def test_get_card_conditional(client: AsyncClient) -> None:
+    deck = await factories.DeckModelFactory.create_async()
+    card = await factories.CardModelFactory.create_async(deck_id=deck.id)
+
+    response = await client.get(f"/api/cards/{card.id}/")
+    etag = response.headers["etag"]
+
+    response = await client.get(f"/api/cards/{card.id}/", headers={"If-None-Match": f'"other", {etag}'})
+    assert response.status_code == status_codes.HTTP_304_NOT_MODIFIED
+
+    response = await client.get(f"/api/cards/{card.id}/", headers={"If-None-Match": '"other"'})
+    assert response.status_code == status_codes.HTTP_200_OK
+    assert response.headers["etag"] == etag
+
+
+async def test_get_cards_conditional(client: AsyncClient) -> None:
+    deck = await factories.DeckModelFactory.create_async()
+    await factories.CardModelFactory.create_batch_async(size=2, deck_id=deck.id)
+
+    response = await client.get(f"/api/decks/{deck.id}/cards/")
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"2-')
+    assert response.headers["vary"] == "Accept"
+
+    response = await client.get(f"/api/decks/{deck.id}/cards/", headers={"If-None-Match": etag})
+    assert response.status_code == status_codes.HTTP_304_NOT_MODIFIED
+    assert response.headers["vary"] == "Accept"
+
+    response = await client.get(f"/api/decks/{deck.id}/cards/", params={"stream": True})
+    assert response.headers["etag"] == etag
+    assert response.headers["vary"] == "Accept"
+
+    # an update that keeps the number of cards still changes the version
+    card = (await client.get(f"/api/decks/{deck.id}/cards/")).json()["items"][0]
+    response = await client.put(f"/api/decks/{deck.id}/cards/", json=[{**card, "front": "updated"}])
+    assert response.status_code == status_codes.HTTP_200_OK
+    response = await client.get(f"/api/decks/{deck.id}/cards/", headers={"If-None-Match": etag})
+    assert response.status_code == status_codes.HTTP_200_OK
+    assert response.headers["etag"].startswith('W/"2-')
+    assert response.headers["etag"] != etag
+
 
 async def test_create_cards(client: AsyncClient) -> None:
     deck = await factories.DeckModelFactory.create_async()
@@ -61,12 +164,13 @@ async def test_create_cards(client: AsyncClient) -> None:
     )
     assert response.status_code == status_codes.HTTP_201_CREATED, response.text
     created_data = response.json()
+    assert set(created_data) == {"items"}
 
     # check creation
     response = await client.get(f"/api/decks/{deck.id}/cards/")
     assert response.status_code == status_codes.HTTP_200_OK
     data = response.json()
-    assert created_data == data
+    assert created_data["items"] == data["items"]
     assert len(data["items"]) == len(cards_to_create)
     for k, v in cards_to_create[0].model_dump().items():
         assert data["items"][0][k] == v
@@ -119,3 +223,77 @@ async def test_update_cards(client: AsyncClient) -> None:
     for x in cards:
         assert x.pop("deck_id") == deck.id
     assert cards == updated_data
+
+
+async def test_update_cards_upserts_in_batches(client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "upsert_batch_size", 2)
+    deck = await factories.DeckModelFactory.create_async()
+    existing = await factories.CardModelFactory.create_batch_async(size=2, deck_id=deck.id)
+    new_id = max(x.id for x in existing) + 1000
+
+    updated_data = [
+        {"id": new_id, "front": "new front", "back": None, "hint": None},
+        {"id": existing[1].id, "front": "front 1 updated", "back": "back 1", "hint": None},
+        {"id": existing[0].id, "front": "front 0 updated", "back": None, "hint": "hint 0"},
+    ]
+    response = await client.put(f"/api/decks/{deck.id}/cards/", json=updated_data)
+    assert response.status_code == status_codes.HTTP_200_OK, response.text
+    assert response.json()["items"] == [{**x, "deck_id": deck.id} for x in updated_data]
+
+    response = await client.get(f"/api/decks/{deck.id}/cards/")
+    assert sorted(response.json()["items"], key=lambda x: x["id"]) == sorted(
+        ({**x, "deck_id": deck.id} for x in updated_data), key=lambda x: x["id"]
+    )
+
+
+@pytest.mark.parametrize("batch_size", [1, 1000])
+async def test_update_cards_skips_unchanged(
+    client: AsyncClient, db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch, batch_size: int
+) -> None:
+    monkeypatch.setattr(settings, "upsert_batch_size", batch_size)
+    deck = await factories.DeckModelFactory.create_async()
+    kept, edited = await factories.CardModelFactory.create_batch_async(size=2, deck_id=deck.id)
+
+    async def updated_at() -> list[object]:
+        statement = sa.select(models.Card.updated_at).where(models.Card.deck_id == deck.id).order_by(models.Card.id)
+        return list(await db_session.scalars(statement))
+
+    before = await updated_at()
+    cards = [
+        {"id": edited.id, "front": "edited", "back": edited.back, "hint": edited.hint},
+        {"id": kept.id, "front": kept.front, "back": kept.back, "hint": kept.hint},
+    ]
+    response = await client.put(f"/api/decks/{deck.id}/cards/", json=cards)
+    assert response.status_code == status_codes.HTTP_200_OK, response.text
+    data = response.json()
+    assert set(data) == {"items", "changed", "unchanged"}
+    assert data["items"] == [{**x, "deck_id": deck.id} for x in cards]
+    assert (data["changed"], data["unchanged"]) == (1, 1)
+
+    after = await updated_at()
+    assert after[0] == before[0]
+    assert after[1] != before[1]
+
+
+async def test_update_cards_repeated_id_keeps_last(client: AsyncClient) -> None:
+    deck = await factories.DeckModelFactory.create_async()
+    card = await factories.CardModelFactory.create_async(deck_id=deck.id)
+
+    response = await client.put(
+        f"/api/decks/{deck.id}/cards/",
+        json=[{"id": card.id, "front": "first"}, {"id": card.id, "front": "last"}],
+    )
+    assert response.status_code == status_codes.HTTP_200_OK, response.text
+    assert [x["front"] for x in response.json()["items"]] == ["last"]
+
+
+async def test_update_cards_unique_front(client: AsyncClient) -> None:
+    deck = await factories.DeckModelFactory.create_async()
+    card1, card2 = await factories.CardModelFactory.create_batch_async(size=2, deck_id=deck.id)
+
+    response = await client.put(
+        f"/api/decks/{deck.id}/cards/",
+        json=[{"id": card2.id, "front": card1.front}],
+    )
+    assert response.status_code == status_codes.HTTP_400_BAD_REQUEST, response.text
+    assert response.json()["detail"] == "A record matching the supplied data already exists."
@@ -0,0 +1,139 @@
+import typing
+
+import pytest
+import sqlalchemy as sa
+from litestar import status_codes
+
+from app import models, pagination
+from app.resources.db import create_sa_engine
+
+
+if typing.TYPE_CHECKING:
+    from httpx import AsyncClient
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+# the feed orders changes by the transactions that wrote them, so these tests commit instead of running in
+# the rolled-back transaction of db_session, and delete their decks afterwards
+
+
+@pytest.fixture
+async def engine() -> typing.AsyncIterator[AsyncEngine]:
+    engine = create_sa_engine()
+    try:
+        yield engine
+    finally:
+        await engine.dispose()
+
+
+@pytest.fixture
+async def deck_ids(engine: AsyncEngine) -> typing.AsyncIterator[list[int]]:
+    deck_ids: list[int] = []
+    try:
+        yield deck_ids
+    finally:
+        async with engine.begin() as connection:
+            await connection.execute(sa.delete(models.Card).where(models.Card.deck_id.in_(deck_ids)))
+            await connection.execute(sa.delete(models.Deck).where(models.Deck.id.in_(deck_ids)))
+
+
+async def _create_deck(client: AsyncClient, deck_ids: list[int], size: int) -> tuple[int, list[int]]:
+    cards = [{"front": f"card {i}"} for i in range(size)]
+    response = await client.post("/api/decks/with-cards/", json={"name": "deck", "cards": cards})
+    assert response.status_code == status_codes.HTTP_201_CREATED, response.text
+    data = response.json()
+    deck_ids.append(data["id"])
+    return data["id"], [card["id"] for card in data["cards"]]
+
+
+async def _changes(client: AsyncClient, deck_id: int, **params: object) -> dict[str, typing.Any]:
+    response = await client.get(f"/api/decks/{deck_id}/changes/", params=params)
+    assert response.status_code == status_codes.HTTP_200_OK, response.text
+    return response.json()
+
+
+async def test_changes_follow_card_writes(client: AsyncClient, engine: AsyncEngine, deck_ids: list[int]) -> None:
+    deck_id, (edited, moved, deleted) = await _create_deck(client, deck_ids, 3)
+    other_deck_id, _ = await _create_deck(client, deck_ids, 0)
+
+    data = await _changes(client, deck_id)
+    assert [x["id"] for x in data["cards"]] == [edited, moved, deleted]
+    assert data["deleted"] == []
+    assert not data["has_more"]
+    cursor = data["next_cursor"]
+    assert await _changes(client, deck_id, since=cursor) == {
+        "cards": [],
+        "deleted": [],
+        "next_cursor": cursor,
+        "has_more": False,
+    }
+
+    response = await client.put(f"/api/decks/{deck_id}/cards/", json=[{"id": edited, "front": "edited"}])
+    assert response.status_code == status_codes.HTTP_200_OK
+    response = await client.put(f"/api/decks/{other_deck_id}/cards/", json=[{"id": moved, "front": "moved"}])
+    assert response.status_code == status_codes.HTTP_200_OK
+    async with engine.begin() as connection:
+        await connection.execute(sa.delete(models.Card).where(models.Card.id == deleted))
+
+    data = await _changes(client, deck_id, since=cursor)
+    assert [(x["id"], x["front"]) for x in data["cards"]] == [(edited, "edited")]
+    assert data["deleted"] == [moved, deleted]
+    assert [x["id"] for x in (await _changes(client, other_deck_id))["cards"]] == [moved]
+
+    # a card moved back is a change of the deck again, its earlier tombstone is not sent after it
+    response = await client.put(f"/api/decks/{deck_id}/cards/", json=[{"id": moved, "front": "back"}])
+    assert response.status_code == status_codes.HTTP_200_OK
+    data = await _changes(client, deck_id, since=cursor)
+    assert [x["id"] for x in data["cards"]] == [edited, moved]
+    assert data["deleted"] == [deleted]
+    assert (await _changes(client, other_deck_id))["deleted"] == [moved]
+
+
+async def test_changes_wait_for_running_transactions(
+    client: AsyncClient, engine: AsyncEngine, deck_ids: list[int]
+) -> None:
+    deck_id, (held, written) = await _create_deck(client, deck_ids, 2)
+    cursor = (await _changes(client, deck_id))["next_cursor"]
+
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        # this transaction writes first and commits last
+        await connection.execute(sa.update(models.Card).where(models.Card.id == held).values(front="held"))
+        response = await client.put(f"/api/decks/{deck_id}/cards/", json=[{"id": written, "front": "written"}])
+        assert response.status_code == status_codes.HTTP_200_OK
+
+        data = await _changes(client, deck_id, since=cursor)
+        assert (data["cards"], data["next_cursor"]) == ([], cursor)
+        await transaction.commit()
+
+    data = await _changes(client, deck_id, since=cursor)
+    assert [x["front"] for x in data["cards"]] == ["held", "written"]
+
+
+async def test_changes_pagination(client: AsyncClient, deck_ids: list[int]) -> None:
+    deck_id, card_ids = await _create_deck(client, deck_ids, 3)
+
+    data = await _changes(client, deck_id, limit=2)
+    assert [x["id"] for x in data["cards"]] == card_ids[:2]
+    assert data["has_more"]
+
+    data = await _changes(client, deck_id, limit=2, since=data["next_cursor"])
+    assert [x["id"] for x in data["cards"]] == card_ids[2:]
+    assert not data["has_more"]
+
+
+async def test_changes_deck_not_exist(client: AsyncClient) -> None:
+    response = await client.get("/api/decks/0/changes/")
+    assert response.status_code == status_codes.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        lambda deck_id: pagination.encode_cursor(deck_id + 1, 0, 0, 0, 0),
+        lambda deck_id: pagination.encode_cursor(deck_id, 0, 0),
+    ],
+)
+async def test_changes_invalid_cursor(client: AsyncClient, cursor: typing.Callable[[int], str]) -> None:
+    response = await client.get("/api/decks/1/changes/", params={"since": cursor(1)})
+    assert response.status_code == status_codes.HTTP_400_BAD_REQUEST
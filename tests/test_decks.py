@@ -2,12 +2,17 @@ from typing import TYPE_CHECKING
 
 import pytest
 from litestar import status_codes
+from sqlalchemy import event
 
+from app import pagination
+from app.repositories import DecksRepository
+from app.settings import settings
 from tests import factories
 
 
 if TYPE_CHECKING:
     from httpx import AsyncClient
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 
 pytestmark = [pytest.mark.usefixtures("set_async_session_in_base_sqlalchemy_factory")]
@@ -35,6 +40,60 @@ async def test_get_decks(client: AsyncClient) -> None:
         assert v == getattr(deck, k)
 
 
+async def test_list_decks_pagination(client: AsyncClient) -> None:
+    decks = await factories.DeckModelFactory.create_batch_async(size=3)
+
+    response = await client.get("/api/decks/", params={"limit": 2})
+    assert response.status_code == status_codes.HTTP_200_OK
+    data = response.json()
+    assert [x["id"] for x in data["items"]] == [x.id for x in decks[:2]]
+    assert data["next_cursor"]
+
+    response = await client.get("/api/decks/", params={"limit": 2, "cursor": data["next_cursor"]})
+    assert response.status_code == status_codes.HTTP_200_OK
+    data = response.json()
+    assert [x["id"] for x in data["items"]] == [decks[2].id]
+    assert data["next_cursor"] is None
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"limit": 0},
+        {"limit": settings.pagination_max_limit + 1},
+        {"cursor": "not-a-cursor"},
+        {"cursor": pagination.encode_cursor(1, 2)},
+    ],
+)
+async def test_list_decks_pagination_wrong_params(client: AsyncClient, params: dict[str, object]) -> None:
+    response = await client.get("/api/decks/", params=params)
+    assert response.status_code == status_codes.HTTP_400_BAD_REQUEST, response.text
+
+
+async def test_list_decks_page_is_keyset_bounded(client: AsyncClient, db_session: AsyncSession) -> None:
+    # page cost stays flat as the table grows: one index-backed `id > :cursor ... LIMIT :page` statement
+    decks = await factories.DeckModelFactory.create_batch_async(size=30)
+    statements: list[tuple[str, tuple[object, ...]]] = []
+
+    def record(_: object, __: object, statement: str, parameters: tuple[object, ...], *___: object) -> None:
+        if "FROM decks" in statement:
+            statements.append((statement, parameters))
+
+    sync_connection = (await db_session.connection()).sync_connection
+    event.listen(sync_connection, "before_cursor_execute", record)
+    try:
+        response = await client.get("/api/decks/", params={"limit": 5, "cursor": pagination.encode_cursor(decks[9].id)})
+    finally:
+        event.remove(sync_connection, "before_cursor_execute", record)
+
+    assert response.status_code == status_codes.HTTP_200_OK
+    assert [x["id"] for x in response.json()["items"]] == [x.id for x in decks[10:15]]
+    [(statement, parameters)] = statements
+    assert "decks.id >" in statement
+    assert "LIMIT" in statement
+    assert 6 in parameters  # noqa: PLR2004
+
+
 async def test_list_decks_omits_cards(client: AsyncClient) -> None:
     deck = await factories.DeckModelFactory.create_async()
     await factories.CardModelFactory.create_async(deck_id=deck.id)
@@ -54,12 +113,107 @@ async def test_get_one_deck(client: AsyncClient) -> None:
     assert response.status_code == status_codes.HTTP_200_OK
     data = response.json()
     assert len(data["cards"]) == 1
+    assert data["card_count"] == 1
     for k, v in data.items():
-        if k == "cards":
+        if k in {"cards", "card_count"}:
             continue
         assert v == getattr(deck, k)
 
 
+async def test_get_one_deck_conditional(client: AsyncClient) -> None:
+    deck = await factories.DeckModelFactory.create_async()
+    await factories.CardModelFactory.create_async(deck_id=deck.id)
+
+    response = await client.get(f"/api/decks/{deck.id}/")
+    assert response.status_code == status_codes.HTTP_200_OK
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"1-')
+    assert response.headers["last-modified"]
+
+    response = await client.get(f"/api/decks/{deck.id}/", headers={"If-None-Match": etag})
+    assert response.status_code == status_codes.HTTP_304_NOT_MODIFIED
+    assert response.headers["etag"] == etag
+    assert not response.content
+
+    response = await client.post(f"/api/decks/{deck.id}/cards/", json=[{"front": "new card"}])
+    assert response.status_code == status_codes.HTTP_201_CREATED
+    response = await client.get(f"/api/decks/{deck.id}/", headers={"If-None-Match": etag})
+    assert response.status_code == status_codes.HTTP_200_OK
+    assert response.headers["etag"] != etag
+
+
+async def test_get_one_deck_conditional_not_exist(client: AsyncClient) -> None:
+    response = await client.get("/api/decks/0/", headers={"If-None-Match": "*"})
+    assert response.status_code == status_codes.HTTP_404_NOT_FOUND
+
+
+async def test_card_count_follows_card_writes(client: AsyncClient) -> None:
+    deck, other_deck = await factories.DeckModelFactory.create_batch_async(size=2)
+
+    async def card_counts() -> dict[int, int]:
+        response = await client.get("/api/decks/")
+        assert response.status_code == status_codes.HTTP_200_OK
+        return {item["id"]: item["card_count"] for item in response.json()["items"]}
+
+    response = await client.post(f"/api/decks/{deck.id}/cards/", json=[{"front": f"card {i}"} for i in range(3)])
+    assert response.status_code == status_codes.HTTP_201_CREATED
+    card_ids = [card["id"] for card in response.json()["items"]]
+    assert await card_counts() == {deck.id: 3, other_deck.id: 0}
+
+    # an upsert updates one card in place and moves another one to the other deck
+    response = await client.put(
+        f"/api/decks/{other_deck.id}/cards/",
+        json=[{"id": card_ids[0], "front": "moved"}, {"id": 10**9 + other_deck.id, "front": "new"}],
+    )
+    assert response.status_code == status_codes.HTTP_200_OK, response.text
+    assert await card_counts() == {deck.id: 2, other_deck.id: 2}
+
+    response = await client.put(f"/api/decks/{other_deck.id}/cards/", json=[{"id": card_ids[0], "front": "edited"}])
+    assert response.status_code == status_codes.HTTP_200_OK, response.text
+    assert await card_counts() == {deck.id: 2, other_deck.id: 2}
+
+
+async def test_get_decks_batch(client: AsyncClient) -> None:
+    deck = await factories.DeckModelFactory.create_async()
+    await factories.CardModelFactory.create_batch_async(size=2, deck_id=deck.id)
+    empty_deck = await factories.DeckModelFactory.create_async()
+
+    response = await client.get("/api/decks/batch/", params={"ids": [deck.id, 0, empty_deck.id, deck.id]})
+    assert response.status_code == status_codes.HTTP_200_OK
+    items = response.json()["items"]
+    assert list(items) == [str(deck.id), "0", str(empty_deck.id)]
+    assert items["0"] is None
+    assert items[str(deck.id)]["name"] == deck.name
+    assert len(items[str(deck.id)]["cards"]) == 2  # noqa: PLR2004
+    assert items[str(empty_deck.id)]["cards"] == []
+
+
+@pytest.mark.parametrize("ids", [[], list(range(1, settings.deck_batch_max_size + 2))])
+async def test_get_decks_batch_size_is_bounded(client: AsyncClient, ids: list[int]) -> None:
+    response = await client.get("/api/decks/batch/", params={"ids": ids})
+    assert response.status_code == status_codes.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.parametrize("cards_count", [0, 3])
+async def test_get_one_deck_json_from_database(client: AsyncClient, db_session: AsyncSession, cards_count: int) -> None:
+    deck = await factories.DeckModelFactory.create_async(name='deck "é"\n\x01', description=None)
+    await factories.CardModelFactory.create_batch_async(size=cards_count, deck_id=deck.id)
+    response = await client.get(f"/api/decks/{deck.id}/")
+    assert response.status_code == status_codes.HTTP_200_OK
+
+    content, version = await DecksRepository(session=db_session).fetch_document(deck.id)
+
+    assert content == response.content
+    assert version.headers == {"ETag": response.headers["etag"], "Last-Modified": response.headers["last-modified"]}
+
+
+async def test_get_one_deck_json_from_database_not_exist(client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "deck_json_from_database", True)
+
+    response = await client.get("/api/decks/0/")
+    assert response.status_code == status_codes.HTTP_404_NOT_FOUND
+
+
 @pytest.mark.parametrize(
     ("name", "description", "status_code"),
     [
@@ -95,6 +249,30 @@ async def test_post_decks(
         assert description == result["description"]
 
 
+@pytest.mark.parametrize("cards_count", [0, 3])
+async def test_post_deck_with_cards(client: AsyncClient, cards_count: int) -> None:
+    cards = [{"front": f"card {i}", "back": f"back {i}"} for i in range(cards_count)]
+    response = await client.post("/api/decks/with-cards/", json={"name": "test deck", "cards": cards})
+    assert response.status_code == status_codes.HTTP_201_CREATED, response.text
+    created = response.json()
+    assert created["card_count"] == cards_count
+    assert [{"front": x["front"], "back": x["back"]} for x in created["cards"]] == cards
+
+    response = await client.get(f"/api/decks/{created['id']}/")
+    assert response.status_code == status_codes.HTTP_200_OK
+    assert response.json() == created
+
+
+async def test_post_deck_with_cards_is_atomic(client: AsyncClient) -> None:
+    response = await client.post(
+        "/api/decks/with-cards/", json={"name": "test deck", "cards": [{"front": "card"}, {"front": "card"}]}
+    )
+    assert response.status_code == status_codes.HTTP_400_BAD_REQUEST, response.text
+
+    response = await client.get("/api/decks/")
+    assert response.json()["items"] == []
+
+
 async def test_put_decks_wrong_body(client: AsyncClient) -> None:
     deck = await factories.DeckModelFactory.create_async()
 
@@ -0,0 +1,36 @@
+import typing
+
+import pytest
+from sqlalchemy.engine import IteratorResult
+from sqlalchemy.engine.result import SimpleResultMetaData
+
+from app import encoding, models, schemas
+
+
+if typing.TYPE_CHECKING:
+    import litestar
+
+
+CARD_ROW: typing.Final = IteratorResult(
+    SimpleResultMetaData(["id", "front", "back", "hint", "deck_id"]), iter([(1, 'front "é"\x01', None, "hint", 2)])
+).one()
+
+
+@pytest.mark.parametrize("obj", [CARD_ROW, models.Card(id=1, front="front", back="back", deck_id=2)])
+def test_encode_matches_pydantic(obj: object) -> None:
+    assert encoding.encode(schemas.Card, obj) == schemas.Card.model_validate(obj).model_dump_json().encode()
+
+    document = {"items": [obj, obj], "next_cursor": "cursor"}
+    assert encoding.encode(schemas.Cards, document) == schemas.Cards.model_validate(document).model_dump_json().encode()
+    assert encoding.encode_many(schemas.Card, [obj]) == [schemas.Card.model_validate(obj).model_dump_json().encode()]
+
+
+def test_fast_path_keeps_openapi_schema(app: litestar.Litestar) -> None:
+    paths = app.openapi_schema.paths
+    assert paths is not None
+    list_cards = paths["/api/decks/{deck_id}/cards/"]
+    assert list_cards.get.responses["200"].content == list_cards.post.responses["201"].content  # ty: ignore
+    list_decks = paths["/api/decks/"]
+    reference = list_decks.get.responses["200"].content["application/json"].schema.ref  # ty: ignore
+    component = app.openapi_schema.components.schemas[reference.rsplit("/", 1)[-1]]
+    assert list(component.properties) == list(schemas.Decks.model_fields)  # ty: ignore
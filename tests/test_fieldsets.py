@@ -0,0 +1,111 @@
+import json
+import typing
+
+import pytest
+from litestar import status_codes
+from sqlalchemy import event
+
+from app import streaming
+from tests import factories
+
+
+if typing.TYPE_CHECKING:
+    from httpx import AsyncClient
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+pytestmark = [pytest.mark.usefixtures("set_async_session_in_base_sqlalchemy_factory")]
+
+
+async def _deck_with_card() -> tuple[int, int]:
+    deck = await factories.DeckModelFactory.create_async()
+    card = await factories.CardModelFactory.create_async(deck_id=deck.id, back="long back", hint="hint")
+    return deck.id, card.id
+
+
+async def test_list_cards_selects_only_requested_columns(client: AsyncClient, db_session: AsyncSession) -> None:
+    deck_id, card_id = await _deck_with_card()
+    statements: list[str] = []
+
+    def record(_: object, __: object, statement: str, *___: object) -> None:
+        if "FROM cards" in statement:
+            statements.append(statement)
+
+    sync_connection = (await db_session.connection()).sync_connection
+    event.listen(sync_connection, "before_cursor_execute", record)
+    try:
+        response = await client.get(f"/api/decks/{deck_id}/cards/", params={"fields": "front,id"})
+    finally:
+        event.remove(sync_connection, "before_cursor_execute", record)
+
+    assert response.status_code == status_codes.HTTP_200_OK
+    [item] = response.json()["items"]
+    assert list(item) == ["front", "id"]
+    assert item["id"] == card_id
+    page_statement = statements[-1]
+    assert "cards.front" in page_statement
+    assert "cards.back" not in page_statement
+    assert "cards.hint" not in page_statement
+
+
+async def test_stream_cards_with_fields(client: AsyncClient) -> None:
+    deck_id, card_id = await _deck_with_card()
+
+    response = await client.get(
+        f"/api/decks/{deck_id}/cards/",
+        params={"fields": "id"},
+        headers={"Accept": streaming.NDJSON_MEDIA_TYPE},
+    )
+    assert response.status_code == status_codes.HTTP_200_OK
+    assert [json.loads(line) for line in response.text.splitlines()] == [{"id": card_id}]
+
+    response = await client.get(f"/api/decks/{deck_id}/cards/", params={"fields": "id", "stream": True})
+    assert response.json() == {"items": [{"id": card_id}], "next_cursor": None}
+
+
+async def test_get_card_with_fields(client: AsyncClient) -> None:
+    _, card_id = await _deck_with_card()
+    response = await client.get(f"/api/cards/{card_id}/")
+    assert response.status_code == status_codes.HTTP_200_OK
+
+    sparse = await client.get(f"/api/cards/{card_id}/", params={"fields": "id,hint"})
+    assert sparse.status_code == status_codes.HTTP_200_OK
+    assert sparse.json() == {"hint": "hint", "id": card_id}
+    assert sparse.headers["etag"] == response.headers["etag"]
+
+
+async def test_list_decks_with_fields(client: AsyncClient) -> None:
+    deck_id, _ = await _deck_with_card()
+
+    response = await client.get("/api/decks/", params={"fields": "id,card_count"})
+    assert response.status_code == status_codes.HTTP_200_OK
+    assert response.json()["items"] == [{"id": deck_id, "card_count": 1}]
+
+
+async def test_get_deck_with_fields(client: AsyncClient) -> None:
+    deck_id, card_id = await _deck_with_card()
+    response = await client.get(f"/api/decks/{deck_id}/")
+    assert response.status_code == status_codes.HTTP_200_OK
+
+    sparse = await client.get(f"/api/decks/{deck_id}/", params={"fields": "name,cards", "card_fields": "id"})
+    assert sparse.status_code == status_codes.HTTP_200_OK
+    assert sparse.json() == {"name": response.json()["name"], "cards": [{"id": card_id}]}
+    assert sparse.headers["etag"] == response.headers["etag"]
+
+    sparse = await client.get(f"/api/decks/{deck_id}/", params={"card_fields": "front"})
+    assert list(sparse.json()) == list(response.json())
+    assert list(sparse.json()["cards"][0]) == ["front"]
+
+
+@pytest.mark.parametrize(
+    ("url", "fields"),
+    [
+        ("/api/decks/", "id,cards"),
+        ("/api/decks/", "id,"),
+        ("/api/decks/0/cards/", "front,name"),
+        ("/api/cards/0/", "ID"),
+    ],
+)
+async def test_unknown_fields_are_rejected(client: AsyncClient, url: str, fields: str) -> None:
+    response = await client.get(url, params={"fields": fields})
+    assert response.status_code == status_codes.HTTP_400_BAD_REQUEST
@@ -0,0 +1,105 @@
+import json
+from typing import TYPE_CHECKING
+
+import pytest
+from litestar import status_codes
+
+from app import importing, streaming
+from tests import factories
+
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+
+
+pytestmark = [pytest.mark.usefixtures("set_async_session_in_base_sqlalchemy_factory")]
+
+
+async def _import(client: AsyncClient, deck_id: int, body: bytes, media_type: str) -> dict[str, object]:
+    response = await client.post(
+        f"/api/decks/{deck_id}/cards/import/", content=body, headers={"Content-Type": media_type}
+    )
+    assert response.status_code == status_codes.HTTP_200_OK, response.text
+    return response.json()
+
+
+async def _cards(client: AsyncClient, deck_id: int) -> dict[str, tuple[str | None, str | None]]:
+    response = await client.get(f"/api/decks/{deck_id}/cards/")
+    return {x["front"]: (x["back"], x["hint"]) for x in response.json()["items"]}
+
+
+async def test_import_cards_csv(client: AsyncClient) -> None:
+    deck = await factories.DeckModelFactory.create_async()
+    existing = await factories.CardModelFactory.create_async(deck_id=deck.id)
+    body = (
+        "front,back,hint\r\n"
+        f"{existing.front},updated back,\r\n"
+        "new,back,hint\r\n"
+        "\r\n"
+        '"multi\nline",,"a ""quoted"" hint"\r\n'
+        "repeated,first,\r\n"
+        "repeated,last,\r\n"
+        ",no front,\r\n"
+        "too,many,columns,here\r\n"
+        '"never closed,back'
+    ).encode()
+
+    report = await _import(client, deck.id, body, f"{importing.CSV_MEDIA_TYPE}; charset=utf-8")
+
+    assert report == {"inserted": 3, "updated": 2, "rejected": 3}
+    assert await _cards(client, deck.id) == {
+        existing.front: ("updated back", None),
+        "new": ("back", "hint"),
+        "multi\nline": (None, 'a "quoted" hint'),
+        "repeated": ("last", None),
+    }
+
+
+async def test_import_cards_csv_malformed_rows(client: AsyncClient) -> None:
+    deck = await factories.DeckModelFactory.create_async()
+    # a quote inside an unquoted field is literal; a bare carriage return makes the csv module reject the row
+    body = b'front,back\n5" screen,size\nbroken\rrow,x\nafter,row\n'
+
+    report = await _import(client, deck.id, body, importing.CSV_MEDIA_TYPE)
+
+    assert report == {"inserted": 2, "updated": 0, "rejected": 1}
+    assert await _cards(client, deck.id) == {'5" screen': ("size", None), "after": ("row", None)}
+
+
+async def test_import_cards_ndjson(client: AsyncClient) -> None:
+    deck = await factories.DeckModelFactory.create_async()
+    lines = [json.dumps({"front": f"front {i}", "back": f"back {i}"}) for i in range(3)]
+    body = "\n".join([*lines, "", "{not json", json.dumps({"back": "no front"})]).encode()
+
+    report = await _import(client, deck.id, body, streaming.NDJSON_MEDIA_TYPE)
+
+    assert report == {"inserted": 3, "updated": 0, "rejected": 2}
+    assert await _cards(client, deck.id) == {f"front {i}": (f"back {i}", None) for i in range(3)}
+
+
+@pytest.mark.parametrize(
+    ("body", "media_type", "status_code"),
+    [
+        (b"[]", "application/json", status_codes.HTTP_415_UNSUPPORTED_MEDIA_TYPE),
+        (b"", importing.CSV_MEDIA_TYPE, status_codes.HTTP_400_BAD_REQUEST),
+        (b"back,hint\nx,y\n", importing.CSV_MEDIA_TYPE, status_codes.HTTP_400_BAD_REQUEST),
+        (b"fr\ront\nx\n", importing.CSV_MEDIA_TYPE, status_codes.HTTP_400_BAD_REQUEST),
+        (b'{"front": "\xff"}\n', streaming.NDJSON_MEDIA_TYPE, status_codes.HTTP_400_BAD_REQUEST),
+    ],
+)
+async def test_import_cards_bad_body(client: AsyncClient, body: bytes, media_type: str, status_code: int) -> None:
+    deck = await factories.DeckModelFactory.create_async()
+
+    response = await client.post(
+        f"/api/decks/{deck.id}/cards/import/", content=body, headers={"Content-Type": media_type}
+    )
+
+    assert response.status_code == status_code, response.text
+    assert await _cards(client, deck.id) == {}
+
+
+async def test_import_cards_missing_deck(client: AsyncClient) -> None:
+    response = await client.post(
+        "/api/decks/0/cards/import/", content=b"front\nx\n", headers={"Content-Type": importing.CSV_MEDIA_TYPE}
+    )
+    assert response.status_code == status_codes.HTTP_404_NOT_FOUND
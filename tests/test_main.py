@@ -3,19 +3,37 @@ from typing import TYPE_CHECKING
 from unittest import mock
 
 import modern_di
+from granian.constants import HTTPModes
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import ioc
+from app.resources import pool_metrics
+from app.settings import settings
 
 
 if TYPE_CHECKING:
+    import pathlib
+
     import pytest
 
 
-def test_main(monkeypatch: pytest.MonkeyPatch) -> None:
-    monkeypatch.setattr("granian.Granian", mock.Mock())
+def test_main(monkeypatch: pytest.MonkeyPatch, tmp_path: pathlib.Path) -> None:
+    server = mock.Mock()
+    monkeypatch.setattr("granian.Granian", server)
+    # several workers share their metrics through the directory; the variable is unset again for the other tests
+    directory = tmp_path / "metrics"
+    monkeypatch.setenv(pool_metrics.MULTIPROC_DIR_ENV, str(directory))
+    monkeypatch.setattr(settings, "app_workers", settings.app_workers + 3)
+    monkeypatch.setattr(settings, "app_http", "2")
+
     runpy.run_module("app.__main__", run_name="__main__")
 
+    options = server.call_args.kwargs
+    assert options["workers"] == settings.app_workers
+    assert options["http"] == HTTPModes.http2
+    server.return_value.serve.assert_called_once_with()
+    assert directory.is_dir()
+
 
 async def test_session() -> None:
     container = modern_di.Container(groups=[ioc.Dependencies])
@@ -0,0 +1,92 @@
+import asyncio
+from typing import TYPE_CHECKING
+
+import asyncpg
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import cache
+from app.resources.db import create_sa_engine
+from app.resources.notifications import DECK_CHANGES_CHANNEL, DeckChangesListener, notify_deck_changed
+
+
+if TYPE_CHECKING:
+    import modern_di
+    import pytest
+
+
+DECK_IDS = (42, 43)
+
+
+async def test_committed_deck_change_invalidates_cache(di_container: modern_di.Container) -> None:
+    response_cache = di_container.resolve(cache.ResponseCache)
+    for deck_id in DECK_IDS:
+        response_cache.set(cache.deck_key(deck_id), cache.CachedResponse(content=b"{}", deck_id=deck_id))
+    received: set[int] = set()
+    all_received = asyncio.Event()
+
+    def receive(deck_id: int) -> None:
+        received.add(deck_id)
+        if received == set(DECK_IDS):
+            all_received.set()
+
+    di_container.resolve(DeckChangesListener).subscribe(receive)
+
+    # another worker's write: a separate, committed transaction
+    engine = create_sa_engine()
+    try:
+        async with AsyncSession(engine) as session:
+            await notify_deck_changed(session, *DECK_IDS)
+            await session.commit()
+    finally:
+        await engine.dispose()
+
+    await asyncio.wait_for(all_received.wait(), timeout=5)
+    assert len(response_cache) == 0
+
+
+async def test_listener_reconnects_and_clears_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    response_cache = cache.ResponseCache(max_size=10, ttl=60)
+    reconnected = asyncio.Event()
+    received = asyncio.Event()
+
+    def on_reconnect() -> None:
+        response_cache.clear()
+        reconnected.set()
+
+    engine = create_sa_engine()
+    listener = DeckChangesListener(engine, reconnect_initial_delay=0.01)
+    listener.subscribe(lambda _: received.set(), on_reconnect=on_reconnect)
+    await listener.start()
+    connect = asyncpg.connect
+    attempts = 0
+
+    async def flaky_connect(dsn: str) -> asyncpg.Connection:
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise ConnectionRefusedError
+        return await connect(dsn)
+
+    monkeypatch.setattr(asyncpg, "connect", flaky_connect)
+    try:
+        response_cache.set(cache.deck_key(DECK_IDS[0]), cache.CachedResponse(content=b"{}", deck_id=DECK_IDS[0]))
+        # the server drops the listening connection, as on a failover, and the first reconnect attempt fails
+        async with AsyncSession(engine) as session:
+            pids = await session.scalars(
+                sa.select(sa.func.pg_terminate_backend(sa.column("pid")))
+                .select_from(sa.table("pg_stat_activity", sa.column("pid"), sa.column("query")))
+                .where(sa.column("query") == f'LISTEN "{DECK_CHANGES_CHANNEL}"')
+            )
+            assert all(pids.all())
+        await asyncio.wait_for(reconnected.wait(), timeout=5)
+        assert attempts == 2  # noqa: PLR2004
+        assert len(response_cache) == 0
+
+        async with AsyncSession(engine) as session:
+            await notify_deck_changed(session, DECK_IDS[0])
+            await session.commit()
+        await asyncio.wait_for(received.wait(), timeout=5)
+    finally:
+        await listener.stop()
+        await engine.dispose()
@@ -0,0 +1,94 @@
+import asyncio
+import typing
+
+import modern_di_litestar
+import pytest
+import sqlalchemy as sa
+from asgi_lifespan import LifespanManager
+
+from app.application import build_app
+from app.resources.db import create_engine_for, create_sa_engine
+from app.resources.pool_health import PoolHealthChecker
+from app.settings import settings
+
+
+if typing.TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+@pytest.fixture
+async def engine() -> typing.AsyncIterator[AsyncEngine]:
+    engine = create_engine_for(settings.db_dsn_parsed, pool_name="health-test", liveness="background")
+    try:
+        yield engine
+    finally:
+        await engine.dispose()
+
+
+async def test_dead_idle_connection_is_replaced(engine: AsyncEngine) -> None:
+    async with engine.connect() as connection:
+        pid = await connection.scalar(sa.select(sa.func.pg_backend_pid()))
+    killer = create_sa_engine()
+    try:
+        async with killer.connect() as connection:
+            # waits up to 5 seconds for the backend to exit
+            assert await connection.scalar(sa.select(sa.func.pg_terminate_backend(pid, 5000)))
+    finally:
+        await killer.dispose()
+    checker = PoolHealthChecker([engine], interval=60, timeout=5)
+
+    assert await checker.check(engine) == 1
+    assert await checker.check(engine) == 0
+    async with engine.connect() as connection:
+        assert await connection.scalar(sa.select(1)) == 1
+
+
+async def test_busy_connections_are_not_pinged(engine: AsyncEngine) -> None:
+    checker = PoolHealthChecker([engine], interval=60, timeout=5)
+    async with engine.connect() as connection:
+        await connection.execute(sa.select(1))
+
+        assert await checker.check(engine) == 0
+        # neither waited for the connection in use nor opened another one
+        assert engine.pool.checkedout() == 1  # ty: ignore[unresolved-attribute]
+        assert engine.pool.checkedin() == 0  # ty: ignore[unresolved-attribute]
+
+
+async def test_checker_survives_failed_rounds(engine: AsyncEngine, monkeypatch: pytest.MonkeyPatch) -> None:
+    checker = PoolHealthChecker([engine], interval=0, timeout=5)
+    rounds = 0
+    retried = asyncio.Event()
+
+    async def check(_: AsyncEngine) -> int:
+        nonlocal rounds
+        rounds += 1
+        if rounds == 1:
+            raise sa.exc.TimeoutError
+        retried.set()
+        return 0
+
+    monkeypatch.setattr(checker, "check", check)
+    checker.start()
+    await asyncio.wait_for(retried.wait(), timeout=5)
+    await checker.stop()
+
+
+async def test_checker_runs_until_stopped(engine: AsyncEngine) -> None:
+    async with engine.connect() as connection:
+        await connection.execute(sa.select(1))
+    checker = PoolHealthChecker([engine], interval=0, timeout=5)
+
+    checker.start()
+    await asyncio.sleep(0.1)
+    await checker.stop()
+    await checker.stop()
+
+
+async def test_background_liveness_starts_checker(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "db_pool_liveness", "background")
+    app = build_app()
+    async with LifespanManager(app):  # ty: ignore[invalid-argument-type]
+        di_container = modern_di_litestar.fetch_di_container(app)
+        checker = di_container.resolve(PoolHealthChecker)
+        assert checker.engines[0].pool.checkedin() == settings.db_pool_size  # ty: ignore[unresolved-attribute]
+    await di_container.close_async()
@@ -0,0 +1,94 @@
+import subprocess
+import sys
+import typing
+from unittest import mock
+
+import prometheus_client
+import sqlalchemy as sa
+from litestar import status_codes
+from opentelemetry.sdk.metrics import MeterProvider
+
+from app.resources import pool_metrics
+from app.resources.db import create_engine_for
+from app.settings import settings
+
+
+if typing.TYPE_CHECKING:
+    import pathlib
+
+    import pytest
+    from httpx import AsyncClient
+
+
+# a worker that checks out a connection and invalidates one, then exits with or without marking itself dead
+_WORKER: typing.Final = """
+import sys
+from app.resources import pool_metrics
+pool_metrics.IN_USE.labels("workers").inc()
+pool_metrics.INVALIDATIONS.labels("workers").inc()
+if sys.argv[1] == "exit":
+    pool_metrics.mark_worker_dead()
+"""
+
+
+def _sample(name: str, pool: str) -> float | None:
+    return prometheus_client.REGISTRY.get_sample_value(name, {"pool": pool})
+
+
+async def test_pool_metrics_follow_pool_events() -> None:
+    engine = create_engine_for(settings.db_dsn_parsed, pool_name="metrics-test")
+    try:
+        async with engine.connect() as connection:
+            await connection.execute(sa.select(1))
+            assert _sample("db_pool_connections_in_use", "metrics-test") == 1
+            assert _sample("db_pool_checkout_wait_seconds_count", "metrics-test") == 1
+            await connection.invalidate()
+        assert _sample("db_pool_connections_in_use", "metrics-test") == 0
+        assert _sample("db_pool_invalidations_total", "metrics-test") == 1
+        assert _sample("db_pool_connection_lifetime_seconds_count", "metrics-test") == 1
+        assert _sample("db_pool_overflow", "metrics-test") == 0
+    finally:
+        await engine.dispose()
+
+
+async def test_pool_metrics_endpoint(client: AsyncClient) -> None:
+    response = await client.get("/api/decks/")
+    assert response.status_code == status_codes.HTTP_200_OK
+
+    response = await client.get("/metrics")
+    assert response.status_code == status_codes.HTTP_200_OK
+    assert 'db_pool_checkout_wait_seconds_count{pool="primary"}' in response.text
+
+
+def test_setup_meter_provider(monkeypatch: pytest.MonkeyPatch) -> None:
+    set_meter_provider = mock.Mock()
+    monkeypatch.setattr(pool_metrics.metrics, "set_meter_provider", set_meter_provider)
+
+    pool_metrics.setup_meter_provider("")
+    set_meter_provider.assert_not_called()
+
+    pool_metrics.setup_meter_provider("http://localhost:4317")
+    (provider,) = set_meter_provider.call_args.args
+    assert isinstance(provider, MeterProvider)
+    provider.shutdown(timeout_millis=100)
+
+
+def test_multiprocess_metrics_add_up_workers(monkeypatch: pytest.MonkeyPatch, tmp_path: pathlib.Path) -> None:
+    directory = tmp_path / "metrics"
+    directory.mkdir()
+    (directory / "counter_0.db").write_bytes(b"an earlier run")
+    (directory / "notes.txt").write_text("not ours")
+    monkeypatch.setenv(pool_metrics.MULTIPROC_DIR_ENV, str(directory))
+
+    pool_metrics.setup_multiprocess_metrics()
+    # only the samples of the earlier run are removed
+    assert [x.name for x in directory.iterdir()] == ["notes.txt"]
+    for mode in ("run", "exit"):
+        subprocess.run([sys.executable, "-c", _WORKER, mode], check=True)  # noqa: S603
+    pool_metrics.mark_worker_dead()
+
+    registry = prometheus_client.CollectorRegistry()
+    pool_metrics.multiprocess.MultiProcessCollector(registry)
+    # the exited worker no longer holds a connection, but its invalidation still counts
+    assert registry.get_sample_value("db_pool_connections_in_use", {"pool": "workers"}) == 1
+    assert registry.get_sample_value("db_pool_invalidations_total", {"pool": "workers"}) == 2  # noqa: PLR2004
@@ -0,0 +1,105 @@
+import logging
+import typing
+
+import pytest
+from litestar import status_codes
+
+from app import importing, query_stats
+from app.settings import settings
+from tests import factories
+
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Callable
+
+    import httpx
+    from httpx import AsyncClient
+
+
+pytestmark = [pytest.mark.usefixtures("set_async_session_in_base_sqlalchemy_factory")]
+
+type QueryCount = Callable[[httpx.Response], int]
+
+
+async def _deck_with_cards(size: int) -> int:
+    deck = await factories.DeckModelFactory.create_async()
+    await factories.CardModelFactory.create_batch_async(size=size, deck_id=deck.id)
+    return deck.id
+
+
+async def test_server_timing_reports_queries(client: AsyncClient, query_count: QueryCount) -> None:
+    response = await client.get("/api/decks/")
+
+    assert response.status_code == status_codes.HTTP_200_OK
+    assert query_count(response) >= 1
+    assert response.headers["server-timing"].startswith("db;dur=")
+
+
+@pytest.mark.parametrize(
+    "request_for_deck",
+    [
+        lambda _, __: ("GET", "/api/decks/", {}),
+        lambda deck_id, _: ("GET", f"/api/decks/{deck_id}/", {}),
+        lambda deck_id, _: ("GET", "/api/decks/batch/", {"params": {"ids": [deck_id, deck_id + 1]}}),
+        lambda deck_id, _: ("GET", f"/api/decks/{deck_id}/cards/", {}),
+        lambda deck_id, _: ("GET", f"/api/decks/{deck_id}/changes/", {}),
+        lambda deck_id, size: (
+            "POST",
+            "/api/decks/with-cards/",
+            {"json": {"name": f"new {deck_id}", "cards": [{"front": f"new {i}"} for i in range(size)]}},
+        ),
+        lambda deck_id, size: (
+            "POST",
+            f"/api/decks/{deck_id}/cards/",
+            {"json": [{"front": f"new {i}"} for i in range(size)]},
+        ),
+        lambda deck_id, size: (
+            "PUT",
+            f"/api/decks/{deck_id}/cards/",
+            {"json": [{"id": 10**9 + deck_id * 100 + i, "front": f"new {i}"} for i in range(size)]},
+        ),
+        lambda deck_id, size: (
+            "POST",
+            f"/api/decks/{deck_id}/cards/import/",
+            {
+                "content": "front\n" + "".join(f"new {i}\n" for i in range(size)),
+                "headers": {"Content-Type": importing.CSV_MEDIA_TYPE},
+            },
+        ),
+    ],
+)
+async def test_query_count_does_not_grow_with_rows(
+    client: AsyncClient,
+    query_count: QueryCount,
+    request_for_deck: Callable[[int, int], tuple[str, str, dict[str, typing.Any]]],
+) -> None:
+    counts = []
+    for size in (1, 20):
+        method, url, kwargs = request_for_deck(await _deck_with_cards(size), size)
+        response = await client.request(method, url, **kwargs)
+        assert response.status_code < status_codes.HTTP_400_BAD_REQUEST, response.text
+        counts.append(query_count(response))
+
+    assert counts[0] == counts[1]
+
+
+async def test_query_budget_exceeded_fails_the_request(client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "query_budget", 0)
+
+    response = await client.get("/api/decks/")
+
+    assert response.status_code == status_codes.HTTP_500_INTERNAL_SERVER_ERROR
+    assert "server-timing" in response.headers
+
+
+async def test_query_budget_exceeded_logs(
+    client: AsyncClient, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    monkeypatch.setattr(settings, "query_budget", 0)
+    monkeypatch.setattr(settings, "query_budget_raise", False)
+
+    with caplog.at_level(logging.WARNING, logger=query_stats.__name__):
+        response = await client.get("/api/decks/")
+
+    assert response.status_code == status_codes.HTTP_200_OK
+    assert "over its budget of 0" in caplog.text
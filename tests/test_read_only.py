@@ -0,0 +1,81 @@
+import typing
+
+import modern_di
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.exc import DBAPIError, InvalidRequestError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app import ioc, models
+from app.repositories import CardsRepository
+from app.resources.db import (
+    READ_ONLY_DETAIL,
+    ReadOnlySession,
+    create_read_engine,
+    create_read_only_session,
+    create_sa_engine,
+)
+
+
+@pytest.fixture
+async def read_engine() -> typing.AsyncIterator[AsyncEngine]:
+    engine = create_sa_engine()
+    try:
+        yield create_read_engine(engine)
+    finally:
+        await engine.dispose()
+
+
+async def test_read_engine_runs_in_autocommit(read_engine: AsyncEngine) -> None:
+    async with read_engine.connect() as connection:
+        await connection.execute(sa.select(1))
+        raw_connection = await connection.get_raw_connection()
+
+        assert not raw_connection.driver_connection.is_in_transaction()
+
+
+async def test_read_only_session_refuses_to_flush_changes(read_engine: AsyncEngine) -> None:
+    async with create_read_only_session(read_engine) as session:
+        await session.flush()
+
+        session.add(models.Deck(name="deck"))
+        with pytest.raises(InvalidRequestError, match=READ_ONLY_DETAIL):
+            await session.flush()
+
+
+async def test_stream_for_deck_in_autocommit(read_engine: AsyncEngine) -> None:
+    async with create_read_only_session(read_engine) as session:
+        repository = CardsRepository(session=session)
+
+        assert [rows async for rows in repository.stream_for_deck(0, None, chunk_size=10)] == []
+
+
+async def test_read_only_session_retries_read_after_disconnect(read_engine: AsyncEngine) -> None:
+    async with create_read_only_session(read_engine) as session:
+        assert await session.scalar(sa.select(1)) == 1
+        raw_connection = await (await session.connection()).get_raw_connection()
+        await raw_connection.driver_connection.close()
+
+        assert await session.scalar(sa.select(sa.literal(2))) == 2  # noqa: PLR2004
+
+
+async def test_read_only_session_raises_other_errors(read_engine: AsyncEngine) -> None:
+    async with create_read_only_session(read_engine) as session:
+        with pytest.raises(DBAPIError, match="division by zero"):
+            await session.scalar(sa.select(sa.literal(1) / 0))
+
+
+async def test_primary_reader_reads_the_primary_in_autocommit() -> None:
+    container = modern_di.Container(groups=[ioc.Dependencies])
+    request_container = container.build_child_container(scope=modern_di.Scope.REQUEST)
+    try:
+        session = request_container.resolve_provider(ioc.Dependencies.cards_primary_reader).repository.session
+        primary = container.resolve_provider(ioc.Dependencies.database_engine)
+
+        assert isinstance(session.sync_session, ReadOnlySession)
+        assert isinstance(session.bind, AsyncEngine)
+        assert session.bind.sync_engine.pool is primary.sync_engine.pool
+        assert session.bind.get_execution_options()["isolation_level"] == "AUTOCOMMIT"
+    finally:
+        await request_container.close_async()
+        await container.close_async()
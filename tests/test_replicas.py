@@ -0,0 +1,87 @@
+import typing
+
+import pytest
+from litestar import status_codes
+from litestar.datastructures import Cookie
+from litestar.testing import RequestFactory
+from sqlalchemy.exc import DBAPIError
+
+from app.application import stick_to_primary
+from app.resources.db import create_sa_engine
+from app.resources.replicas import STICKY_PRIMARY_COOKIE, ReplicaRouter, create_read_session
+from app.settings import settings
+
+
+if typing.TYPE_CHECKING:
+    from litestar.types import Message, Scope
+
+
+UNREACHABLE_URL = settings.db_dsn_parsed.set(port=1)
+
+
+async def test_replica_router_round_robin() -> None:
+    router = ReplicaRouter([settings.db_dsn_parsed, settings.db_dsn_parsed], retry_after=60)
+    try:
+        assert [router.pick() for _ in range(3)] == [router.engines[0], router.engines[1], router.engines[0]]
+    finally:
+        await router.dispose()
+
+
+async def test_replica_router_skips_replica_that_failed_to_connect() -> None:
+    router = ReplicaRouter([UNREACHABLE_URL, settings.db_dsn_parsed], retry_after=60)
+    try:
+        with pytest.raises((OSError, DBAPIError)):
+            async with router.engines[0].connect():
+                pass
+
+        assert [router.pick() for _ in range(2)] == [router.engines[1], router.engines[1]]
+        async with router.engines[1].connect():
+            pass
+        assert router.pick() is router.engines[1]
+    finally:
+        await router.dispose()
+
+
+async def test_replica_router_without_healthy_replicas() -> None:
+    assert ReplicaRouter([], retry_after=60).pick() is None
+
+
+@pytest.mark.parametrize(
+    ("replicas", "cookies", "on_replica"),
+    [
+        ([settings.db_dsn_parsed], None, True),
+        ([settings.db_dsn_parsed], [Cookie(key=STICKY_PRIMARY_COOKIE, value="1")], False),
+        ([], None, False),
+    ],
+)
+async def test_read_session_binding(replicas: list[typing.Any], cookies: list[Cookie] | None, on_replica: bool) -> None:
+    primary = create_sa_engine()
+    router = ReplicaRouter(replicas, retry_after=60)
+    try:
+        session = create_read_session(primary, router, RequestFactory().get(cookies=cookies))
+        assert session.bind is (router.engines[0] if on_replica else primary)
+        await session.close()
+    finally:
+        await router.dispose()
+        await primary.dispose()
+
+
+@pytest.mark.parametrize(
+    ("method", "status_code", "sticky"),
+    [
+        ("POST", status_codes.HTTP_201_CREATED, True),
+        ("PUT", status_codes.HTTP_200_OK, True),
+        ("PUT", status_codes.HTTP_400_BAD_REQUEST, False),
+        ("GET", status_codes.HTTP_200_OK, False),
+    ],
+)
+async def test_stick_to_primary_after_writes(method: str, status_code: int, sticky: bool) -> None:
+    message = typing.cast("Message", {"type": "http.response.start", "status": status_code, "headers": []})
+
+    await stick_to_primary(message, typing.cast("Scope", {"type": "http", "method": method}))
+
+    cookies = [value.decode() for key, value in message["headers"] if key == b"set-cookie"]  # ty: ignore[invalid-key]
+    assert bool(cookies) is sticky
+    if sticky:
+        assert cookies[0].startswith(f"{STICKY_PRIMARY_COOKIE}=1;")
+        assert f"Max-Age={settings.db_sticky_primary_seconds}" in cookies[0]
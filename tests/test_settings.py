@@ -1,3 +1,6 @@
+import pydantic
+import pytest
+
 from app.settings import Settings
 
 
@@ -8,3 +11,32 @@ def test_api_bootstrapper_config_reads_instance_not_global() -> None:
 
     assert config.service_name == "custom-service"
     assert config.service_version == "9.9.9"
+
+
+def test_db_connections_total_counts_every_worker() -> None:
+    workers, pool_size, max_overflow = 4, 10, 5
+    custom = Settings(app_workers=workers, db_pool_size=pool_size, db_max_overflow=max_overflow)
+
+    # every worker also holds a dedicated LISTEN connection
+    assert custom.db_connections_per_worker == pool_size + max_overflow + 1
+    assert custom.db_connections_total == workers * custom.db_connections_per_worker
+
+
+def test_db_connection_budget_is_enforced() -> None:
+    with pytest.raises(pydantic.ValidationError, match="db_connection_budget=50"):
+        Settings(app_workers=4, db_pool_size=10, db_max_overflow=5, db_connection_budget=50)
+
+
+@pytest.mark.parametrize(("pre_ping", "liveness"), [("false", "background"), ("true", "pre_ping")])
+def test_db_pool_pre_ping_maps_onto_liveness(monkeypatch: pytest.MonkeyPatch, pre_ping: str, liveness: str) -> None:
+    monkeypatch.setenv("DB_POOL_PRE_PING", pre_ping)
+
+    with pytest.warns(FutureWarning, match=f"db_pool_liveness={liveness}"):
+        custom = Settings()
+
+    assert custom.db_pool_liveness == liveness
+
+
+def test_db_pool_pre_ping_contradicting_liveness_is_rejected() -> None:
+    with pytest.raises(pydantic.ValidationError, match="contradicts db_pool_liveness=pre_ping"):
+        Settings(db_pool_pre_ping=False, db_pool_liveness="pre_ping")